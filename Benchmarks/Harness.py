@@ -0,0 +1,195 @@
+'''
+    Harness.py
+
+    Runs the DynamicForm benchmarks - reporting time and allocations per call and comparing them to a stored baseline
+
+    Usage: python Benchmarks/Harness.py [--baseline baseline.json] [--save baseline.json] [--tolerance 10]
+                                        [--filter text] [benchmark_module ...]
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+MINIMUM_TIME = 0.2 # seconds each timing run should take at least
+REPEAT = 5 # timing runs per benchmark - the fastest is reported
+MAXIMUM_ALLOCATION_CALLS = 1000
+
+
+def measure(benchmark):
+    """
+        Returns the performance of calling benchmark as a dictionary of:
+            microseconds - the fastest time per call
+            blocks / bytes - the memory blocks and bytes per call still held after it returns (including its result)
+            peak - the peak memory in bytes a single call allocates while running
+    """
+    timer = timeit.Timer(benchmark)
+    number = timer.autorange()[0] if hasattr(timer, 'autorange') else 1000
+    seconds = min(timer.repeat(repeat=REPEAT, number=number))
+
+    calls = min(number, MAXIMUM_ALLOCATION_CALLS)
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for call in range(calls):
+        kept.append(benchmark())
+    after = tracemalloc.take_snapshot()
+
+    tracemalloc.clear_traces()
+    current = tracemalloc.get_traced_memory()[0]
+    benchmark()
+    peak = tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    statistics = after.compare_to(before, 'filename')
+    return {'microseconds':seconds * 1000000 / number,
+            'blocks':sum(max(statistic.count_diff, 0) for statistic in statistics) / float(calls),
+            'bytes':sum(max(statistic.size_diff, 0) for statistic in statistics) / float(calls),
+            'peak':peak}
+
+
+def benchmarkModules(names=None):
+    """
+        Imports and returns (name, module or the ImportError raised) for the given benchmark modules - defaulting
+        to every benchmark_*.py module next to this file
+    """
+    if not names:
+        names = sorted(os.path.basename(path)[:-3]
+                       for path in glob.glob(os.path.join(BENCHMARK_DIRECTORY, "benchmark_*.py")))
+
+    modules = []
+    for name in names:
+        try:
+            modules.append((name, importlib.import_module(name)))
+        except ImportError as e:
+            modules.append((name, e))
+    return modules
+
+
+def run(modules, nameFilter=None, output=sys.stdout):
+    """
+        Runs the BENCHMARKS ((name, callable) pairs) of every module - returning {benchmark name: measurements}
+    """
+    results = {}
+    for moduleName, module in modules:
+        if isinstance(module, ImportError):
+            output.write("%s skipped: %s\n" % (moduleName, module))
+            continue
+
+        for name, benchmark in module.BENCHMARKS:
+            name = "%s: %s" % (moduleName, name)
+            if nameFilter and nameFilter not in name:
+                continue
+            results[name] = measure(benchmark)
+            output.write(formatResult(name, results[name]) + "\n")
+            output.flush()
+    return results
+
+
+def formatResult(name, result, baseline=None):
+    line = "%-64s %12.2f us %10.1f blocks %12.0f bytes %12.0f peak" % (name, result['microseconds'], result['blocks'],
+                                                                      result['bytes'], result['peak'])
+    if baseline:
+        line += " %+8.1f%%" % change(result, baseline)
+    return line
+
+
+def change(result, baseline):
+    """
+        Returns the percentage the time of a result changed compared to its baseline
+    """
+    return (result['microseconds'] - baseline['microseconds']) * 100.0 / baseline['microseconds']
+
+
+def compare(results, baseline, tolerance, modules=None, nameFilter=None, output=sys.stdout):
+    """
+        Writes how each result compares to the baseline - returning the names of the benchmarks that got slower
+        by more than tolerance percent or hold more memory than before, along with the baseline benchmarks of the
+        given modules (and filter) that were not measured - including every module that could not be imported
+    """
+    regressions = []
+    output.write("\nCompared to baseline (%s):\n" % baseline.get('environment', {}).get('python', 'unknown python'))
+    for name in sorted(results):
+        previous = baseline['results'].get(name)
+        if previous is None:
+            output.write("%s: new benchmark\n" % name)
+            continue
+
+        output.write(formatResult(name, results[name], previous) + "\n")
+        if change(results[name], previous) > tolerance or results[name]['blocks'] > previous['blocks'] + 0.5:
+            regressions.append(name)
+
+    moduleNames = modules is not None and set(moduleName for moduleName, module in modules) or None
+    for moduleName, module in modules or ():
+        if isinstance(module, ImportError):
+            regressions.append(moduleName)
+    for name in sorted(baseline['results']):
+        if name in results or (nameFilter and nameFilter not in name):
+            continue
+        if moduleNames is None or name.split(":", 1)[0] in moduleNames:
+            output.write("%s: not measured\n" % name)
+            regressions.append(name)
+
+    for name in regressions:
+        output.write("REGRESSION: %s\n" % name)
+    return regressions
+
+
+def environment():
+    return {'python':"%s %s" % (platform.python_implementation(), platform.python_version()),
+            'platform':platform.platform()}
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Runs the DynamicForm benchmarks")
+    parser.add_argument('modules', nargs='*', help="benchmark modules to run (defaults to all of them)")
+    parser.add_argument('--baseline', help="a results file to compare against - exits with 1 on regressions or "
+                                           "when benchmarks in it could not be run")
+    parser.add_argument('--save', help="a file to store the results in (to be used as a baseline later)")
+    parser.add_argument('--tolerance', type=float, default=10.0,
+                        help="the percentage a benchmark may get slower before it counts as a regression")
+    parser.add_argument('--filter', help="only run the benchmarks whose name contains this text")
+    options = parser.parse_args(arguments)
+
+    sys.path.insert(0, os.path.dirname(BENCHMARK_DIRECTORY)) # the DynamicForm package
+    sys.path.insert(0, BENCHMARK_DIRECTORY)
+    modules = benchmarkModules(options.modules)
+    results = run(modules, options.filter)
+
+    if options.save:
+        with open(options.save, 'w') as resultsFile:
+            json.dump({'environment':environment(), 'results':results}, resultsFile, indent=4, sort_keys=True)
+
+    if options.baseline:
+        with open(options.baseline) as baselineFile:
+            baseline = json.load(baselineFile)
+        if compare(results, baseline, options.tolerance, modules, options.filter):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+'''
+    SyntheticTrees.py
+
+    Builds synthetic handler, control and page trees - parameterized by depth, width and template size - to benchmark
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+from DynamicForm.RequestHandler import RequestHandler
+
+
+def renderAccessor(handler, request):
+    return handler.accessor
+
+
+def handlerTree(depth, width, baseClass=RequestHandler, name="Root", attributes=None):
+    """
+        Returns a handler class with width child handler classes nested in it per level - depth levels deep
+        (so depth=1 is a lone handler). Every class is created from baseClass with the given attributes - by default
+        a renderResponse that returns the handler's accessor
+    """
+    classAttributes = dict(attributes) if attributes is not None else {'renderResponse':renderAccessor}
+    if depth > 1:
+        for index in range(width):
+            childName = "Child%d" % index
+            classAttributes[childName] = handlerTree(depth - 1, width, baseClass, childName, attributes)
+
+    return type(name, (baseClass, ), classAttributes)
+
+
+def leafAccessors(rootHandler):
+    """
+        Returns the accessors of every handler in the tree that has no child handlers, in a stable order
+    """
+    return sorted(handler.accessor for handler in rootHandler.allHandlers() if not handler.childHandlers)
+
+
+def templateSHPAML(size):
+    """
+        Returns a template with size labels in a flow layout
+    """
+    return "> flow\n" + "".join("    > label@label%d text=Label%d\n" % (index, index) for index in range(size))
+
+
+def templateControl(size, name="TemplatedControl"):
+    """
+        Returns a TemplateControl class whose template has size elements
+    """
+    from WebElements import UITemplate
+    from DynamicForm.PageControls import TemplateControl
+
+    return type(name, (TemplateControl, ), {'template':UITemplate.fromSHPAML(templateSHPAML(size))})
+
+
+def controlTree(depth, width, templateSize):
+    """
+        Returns a tree (as handlerTree) of TemplateControl classes that each render a template with templateSize
+        elements
+    """
+    from WebElements import UITemplate
+    from DynamicForm.PageControls import TemplateControl
+
+    return handlerTree(depth, width, TemplateControl, "RootControl",
+                       {'template':UITemplate.fromSHPAML(templateSHPAML(templateSize))})
+
+
+def page(templateSize, name="BenchmarkPage"):
+    """
+        Returns a DynamicForm page class whose main control renders a template with templateSize elements
+    """
+    from DynamicForm.DynamicForm import DynamicForm
+
+    return type(name, (DynamicForm, ), {'MainControl':templateControl(templateSize, "MainControl")})
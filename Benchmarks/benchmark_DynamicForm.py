@@ -0,0 +1,49 @@
+'''
+    benchmark_DynamicForm.py
+
+    Measures rendering a complete DynamicForm page by the size of its main control's template
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import sys
+
+from DynamicForm import HTTP
+from SyntheticTrees import page
+
+TEMPLATE_SIZES = (10, 100)
+
+
+def renderPage(templateSize):
+    form = page(templateSize)()
+    return lambda: form.handleRequest(HTTP.Request({'requestHandler':form.accessor}, method="GET"))
+
+
+def renderMainControl(templateSize):
+    form = page(templateSize)()
+    fields = {'requestHandler':form.mainControl.accessor}
+    return lambda: form.handleRequest(HTTP.Request(fields, method="GET"))
+
+
+BENCHMARKS = tuple(("%s template size=%d" % (kind, templateSize), factory(templateSize))
+                   for templateSize in TEMPLATE_SIZES
+                   for kind, factory in (('page', renderPage), ('main control', renderMainControl)))
+
+
+if __name__ == "__main__":
+    import Harness
+    sys.exit(Harness.main(sys.argv[1:] + ['benchmark_DynamicForm']))
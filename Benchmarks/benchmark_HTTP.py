@@ -0,0 +1,55 @@
+'''
+    benchmark_HTTP.py
+
+    Measures the time and memory allocated to create, copy and serialize the HTTP request and response objects
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import sys
+
+from DynamicForm import HTTP
+
+FIELDS = {'requestHandler':'page-mainControl', 'requestID':'mainControl', 'name':'value', 'list':['A', 'B']}
+
+
+def createRequest():
+    return HTTP.Request(FIELDS, method="GET")
+
+
+def createAndRespond():
+    request = HTTP.Request(FIELDS, method="GET")
+    request.response.content = "content"
+    return request.response.headerList()
+
+
+def copyRequest(request=HTTP.Request(FIELDS, method="GET")):
+    return request.copy()
+
+
+def multiRequest(request=HTTP.Request(FIELDS, method="GET")):
+    responses = [request.copy().response for handler in range(10)]
+    return [response.serialize() for response in responses]
+
+
+BENCHMARKS = (('Request()', createRequest), ('Request() + headerList()', createAndRespond),
+              ('Request.copy()', copyRequest), ('10 sub-request responses', multiRequest))
+
+
+if __name__ == "__main__":
+    import Harness
+    sys.exit(Harness.main(sys.argv[1:] + ['benchmark_HTTP']))
@@ -0,0 +1,56 @@
+'''
+    benchmark_PageControls.py
+
+    Measures building and rendering template controls by template size and rendering trees of them together
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import sys
+
+from DynamicForm import HTTP
+from SyntheticTrees import controlTree, leafAccessors, templateControl
+
+TEMPLATE_SIZES = (10, 100)
+TREE = (2, 10) # (depth, width) of the control tree rendered as one MULTI_STATUS request
+
+
+def buildUI(templateSize):
+    control = templateControl(templateSize)()
+    return lambda: control.buildUI(HTTP.Request(method="GET"))
+
+
+def renderResponse(templateSize):
+    control = templateControl(templateSize)()
+    return lambda: control.renderResponse(HTTP.Request(method="GET"))
+
+
+def multiRender(templateSize):
+    root = controlTree(TREE[0], TREE[1], templateSize)()
+    fields = {'requestHandler':leafAccessors(root)}
+    return lambda: root.handleRequest(HTTP.Request(fields, method="GET"))
+
+
+BENCHMARKS = tuple(("%s template size=%d" % (kind, templateSize), factory(templateSize))
+                   for templateSize in TEMPLATE_SIZES
+                   for kind, factory in (('buildUI', buildUI), ('renderResponse', renderResponse),
+                                         ('%d controls multi render' % (TREE[1] ** (TREE[0] - 1)), multiRender)))
+
+
+if __name__ == "__main__":
+    import Harness
+    sys.exit(Harness.main(sys.argv[1:] + ['benchmark_PageControls']))
@@ -0,0 +1,73 @@
+'''
+    benchmark_RequestHandler.py
+
+    Measures building handler trees of several shapes and dispatching single and multi-handler requests through them
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import sys
+
+from DynamicForm import HTTP
+from SyntheticTrees import handlerTree, leafAccessors
+
+SHAPES = ((2, 5), (3, 5), (4, 3), (3, 10)) # (depth, width) of the benchmarked trees
+
+
+def coldTree(depth, width):
+    """
+        Returns a benchmark that creates new handler classes and builds their first tree - paying every per-class cost
+    """
+    return lambda: handlerTree(depth, width)()
+
+
+def warmTree(depth, width):
+    """
+        Returns a benchmark that builds another tree from handler classes that have built one before
+    """
+    rootClass = handlerTree(depth, width)
+    rootClass()
+    return rootClass
+
+
+def dispatch(depth, width):
+    """
+        Returns a benchmark that sends a GET request to the deepest (last) leaf handler of a tree
+    """
+    root = handlerTree(depth, width)()
+    fields = {'requestHandler':leafAccessors(root)[-1]}
+    return lambda: root.handleRequest(HTTP.Request(fields, method="GET"))
+
+
+def multiDispatch(depth, width):
+    """
+        Returns a benchmark that sends one MULTI_STATUS request for every leaf handler of a tree
+    """
+    root = handlerTree(depth, width)()
+    fields = {'requestHandler':leafAccessors(root)}
+    return lambda: root.handleRequest(HTTP.Request(fields, method="GET"))
+
+
+BENCHMARKS = tuple(("%s tree depth=%d width=%d" % (kind, depth, width), factory(depth, width))
+                   for depth, width in SHAPES
+                   for kind, factory in (('cold', coldTree), ('warm', warmTree), ('dispatch', dispatch),
+                                         ('multi dispatch', multiDispatch)))
+
+
+if __name__ == "__main__":
+    import Harness
+    sys.exit(Harness.main(sys.argv[1:] + ['benchmark_RequestHandler']))
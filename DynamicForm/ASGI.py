@@ -0,0 +1,140 @@
+'''
+    ASGI.py
+
+    Defines an ASGI application that serves a request handler tree - awaiting asynchronous handlers on the event
+    loop while running synchronous ones on a bounded thread pool (requires Python 3.7+)
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from . import Async, HTTP
+
+
+class Application(object):
+    """
+        An ASGI application that serves the given root request handler.
+        NOTE: the request body is read into memory in full before the request is handled (its fields are parsed from
+        it) - set maxBodySize (in bytes) to reject larger bodies with a 413 instead of buffering them
+    """
+
+    def __init__(self, rootHandler, threads=None, maxBodySize=None):
+        self.rootHandler = rootHandler
+        self.executor = ThreadPoolExecutor(threads)
+        self.maxBodySize = maxBodySize
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self.handle(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+
+    async def lifespan(self, receive, send):
+        """
+            Acknowledges the server's startup and shutdown events
+        """
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type':'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type':'lifespan.shutdown.complete'})
+                return
+
+    async def handle(self, scope, receive, send):
+        """
+            Handles a single HTTP request
+        """
+        environ = self.environ(scope)
+        chunks = []
+        bodySize = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+            chunk = message.get('body', b'')
+            bodySize += len(chunk)
+            if self.maxBodySize is not None and bodySize > self.maxBodySize:
+                response = HTTP.Response("Request Entity Too Large", HTTP.Response.ContentType.TEXT,
+                                         HTTP.Response.Status.REQUEST_ENTITY_TOO_LARGE)
+                return await self.send(send, response)
+
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+
+        body = b''.join(chunks)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        environ['wsgi.input'] = io.BytesIO(body)
+        request = HTTP.Request.fromWSGIEnviron(environ)
+
+        response = await Async.handleRequest(self.rootHandler, request, executor=self.executor)
+        if self.rootHandler.compressResponses:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.rootHandler.compressResponse,
+                                                             request, response)
+        await self.send(send, response)
+
+    def environ(self, scope):
+        """
+            Returns a WSGI style environ dictionary (used as the request meta data) for the given ASGI scope
+        """
+        environ = {'REQUEST_METHOD':scope['method'], 'SCRIPT_NAME':scope.get('root_path', ''),
+                   'PATH_INFO':scope['path'], 'QUERY_STRING':scope.get('query_string', b'').decode('latin-1'),
+                   'SERVER_PROTOCOL':'HTTP/' + scope.get('http_version', '1.1'),
+                   'wsgi.url_scheme':scope.get('scheme', 'http'), 'asgi.scope':scope}
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+
+        for name, value in scope.get('headers', ()):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = 'HTTP_' + name
+            if name in environ:
+                value = environ[name] + "," + value
+            environ[name] = value
+
+        return environ
+
+    async def send(self, send, response):
+        """
+            Sends the given response object to the client - iterating streamed content on the thread pool
+        """
+        content = response.content
+        headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headerList()]
+        if isinstance(content, HTTP.STRING_TYPES):
+            content = response._encode(content)
+            headers.append((b'content-length', str(len(content)).encode('latin-1')))
+
+        await send({'type':'http.response.start', 'status':response.status, 'headers':headers})
+        if isinstance(content, bytes):
+            await send({'type':'http.response.body', 'body':content})
+            return
+
+        loop = asyncio.get_running_loop()
+        chunks = iter(content)
+        while True:
+            chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+            if chunk is None:
+                break
+            await send({'type':'http.response.body', 'body':response._encode(chunk), 'more_body':True})
+        await send({'type':'http.response.body', 'body':b''})
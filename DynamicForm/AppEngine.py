@@ -14,30 +14,27 @@ class DynamicForm(webapp2.RequestHandler, BaseDynamicForm):
         webapp2.RequestHandler.__init__(self, request, response)
         BaseDynamicForm.__init__(self)
 
+    def _respond(self, method):
+        request = HTTP.Request.fromAppEngineRequest(self.request, method)
+        return self.compressResponse(request, self.handleRequest(request)).toAppEngineResponse(self.response)
+
     def get(self):
-        response = self.handleRequest(HTTP.Request.fromAppEngineRequest(self.request, "GET"))
-        return response.toAppEngineResponse(self.response)
+        return self._respond("GET")
 
     def post(self):
-        response = self.handleRequest(HTTP.Request.fromAppEngineRequest(self.request, "POST"))
-        return response.toAppEngineResponse(self.response)
+        return self._respond("POST")
 
     def put(self):
-        response = self.handleRequest(HTTP.Request.fromAppEngineRequest(self.request, "PUT"))
-        return response.toAppEngineResponse(self.response)
+        return self._respond("PUT")
 
     def head(self):
-        response = self.handleRequest(HTTP.Request.fromAppEngineRequest(self.request, "HEAD"))
-        return response.toAppEngineResponse(self.response)
+        return self._respond("HEAD")
 
     def options(self):
-        response = self.handleRequest(HTTP.Request.fromAppEngineRequest(self.request, "OPTIONS"))
-        return response.toAppEngineResponse(self.response)
+        return self._respond("OPTIONS")
 
     def delete(self):
-        response = self.handleRequest(HTTP.Request.fromAppEngineRequest(self.request, "DELETE"))
-        return response.toAppEngineResponse(self.response)
+        return self._respond("DELETE")
 
     def trace(self):
-        response = self.handleRequest(HTTP.Request.fromAppEngineRequest(self.request, "TRACE"))
-        return response.toAppEngineResponse(self.response)
+        return self._respond("TRACE")
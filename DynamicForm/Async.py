@@ -0,0 +1,185 @@
+'''
+    Async.py
+
+    Defines the asyncio based request handling path - enabling request handlers and page control hooks to be
+    written as coroutines (requires Python 3.7+)
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import asyncio
+import inspect
+import json
+
+from . import HTTP
+from . import Tracing
+
+HOOKS = ('renderResponse', 'canView', 'canEdit', '_canView', '_canEdit', 'contentVersion', 'buildUI', 'initUI',
+         'populateUI', 'setUIData', 'validGet', 'validPost', 'validDelete', 'validPut', 'processGet', 'processPost',
+         'processDelete', 'processPut')
+asyncHandlers = {}
+
+
+async def resolve(value):
+    """
+        Returns the given value - awaiting it first if it is awaitable
+    """
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def isAsync(handler):
+    """
+        Returns True if any part of rendering the handler (its response, UI hooks or the permission checks of it or
+        its parents) is a coroutine
+    """
+    while handler is not None:
+        handlerClass = type(handler)
+        result = asyncHandlers.get(handlerClass, None)
+        if result is None:
+            result = asyncHandlers[handlerClass] = any(inspect.iscoroutinefunction(getattr(handlerClass, hook, None))
+                                                       for hook in HOOKS)
+        if result:
+            return True
+        handler = handler.parentHandler
+    return False
+
+
+async def resolvePermissions(handler, request):
+    """
+        Awaits the canView and canEdit checks of the handler and its parents (root first) - storing the results in
+        request.permissions so the synchronous checks made while rendering read plain values instead of coroutines
+    """
+    handlers = []
+    while handler is not None:
+        handlers.append(handler)
+        handler = handler.parentHandler
+
+    for handler in reversed(handlers):
+        for permission in ('canView', 'canEdit'):
+            key = (permission, handler.accessor)
+            if key not in request.permissions:
+                request.permissions[key] = await resolve(getattr(handler, permission)(request))
+
+
+async def handleRequest(rootHandler, request, handlers=None, executor=None):
+    """
+        Handles a single request against the handler tree returning a response object - the coroutine equivalent
+        of RequestHandler.handleRequest (multi-handler requests are rendered concurrently).
+        If an executor is given handlers that are not asynchronous are handled on it instead of the event loop.
+    """
+    if handlers is None and request.span is None and (rootHandler.tracer or rootHandler.serverTiming):
+        with Tracing.trace(request, rootHandler) as span:
+            response = await handleRequest(rootHandler, request, None, executor)
+        if rootHandler.serverTiming:
+            response['Server-Timing'] = span.serverTiming()
+        return response
+
+    if handlers is None:
+        handlers = request.fields.get('requestHandler', '')
+        if type(handlers) in (list, set, tuple):
+            resolved = [handler for handler in map(rootHandler.resolveHandler, handlers) if handler is not None]
+            await resolve(rootHandler.resolvePermissions(request, resolved))
+            responses = await asyncio.gather(*[handleRequest(rootHandler, request.copy(), handler, executor)
+                                               for handler in handlers])
+            request.response.status = HTTP.Response.Status.MULTI_STATUS
+            request.response.contentType = HTTP.Response.ContentType.JSON
+            request.response.content = json.dumps([response.serialize() for response in responses])
+            return request.response
+    elif type(handlers) == list:
+        handlers = "-".join(handlers)
+
+    handler = rootHandler.resolveHandler(handlers)
+    if handler is not None and executor is not None and not isAsync(handler):
+        return await asyncio.get_running_loop().run_in_executor(executor, rootHandler.handleRequest, request, handlers)
+    if rootHandler.metrics is None and not rootHandler.tracer:
+        return await respond(rootHandler, request, handler, handlers)
+
+    start = Tracing.timer() if rootHandler.metrics is not None else None
+    return rootHandler._measure(request, handler, await respond(rootHandler, request, handler, handlers), start)
+
+
+async def respond(rootHandler, request, handler, accessor):
+    """
+        Renders the response of the resolved handler (or the not found response if it is None) - the coroutine
+        equivalent of RequestHandler._respondWith
+    """
+    if handler is None:
+        request.response.status = HTTP.Response.Status.NOT_FOUND
+        request.response.content = rootHandler.renderNotFound(request, accessor)
+        return request.response
+
+    try:
+        await resolvePermissions(handler, request)
+        if not request.permissions[('canView', handler.accessor)] or \
+           (request.method != "GET" and not request.permissions[('canEdit', handler.accessor)]):
+            request.response.status = HTTP.Response.Status.UNAUTHORIZED
+            request.response.content = handler.renderUnauthorized(request)
+            return request.response
+
+        conditional = (handler.useETags or rootHandler.useETags) and request.method == "GET"
+        etag = conditional and handler.versionETag(request)
+        if etag and handler._notModified(request, etag):
+            return request.response
+
+        with Tracing.span(request, handler, "renderResponse"):
+            request.response.content = await handler.renderResponseAsync(request)
+        if conditional and isinstance(request.response.content, HTTP.STRING_TYPES):
+            handler._notModified(request, etag or handler.etag(request, request.response.content))
+    except Exception as e:
+        request.response.status = HTTP.Response.Status.INTERNAL_SERVER_ERROR
+        request.response.content = handler.renderInternalError(request, e)
+
+    return request.response
+
+
+async def renderControl(control, request):
+    """
+        Renders a page control the same way as PageControl.renderResponse - awaiting each hook that is a coroutine
+    """
+    request = control.request or request
+    control._setRequestID(request)
+    cacheKey = control.cacheKey(request)
+    if cacheKey is not None:
+        request.response.encodingCache = control.encodingCache()
+        cached = control.fragmentCache().get(cacheKey)
+        if cached is not None:
+            return cached
+
+    with Tracing.span(request, control, "buildUI"):
+        ui = await resolve(control.buildUI(request))
+    with Tracing.span(request, control, "initUI"):
+        await resolve(control.initUI(ui, request))
+    control._modifyUI(ui, request)
+    if request.method != "GET":
+        with Tracing.span(request, control, "populateUI"):
+            await resolve(control.populateUI(ui, request))
+    if control.autoReload:
+        ui.clientSide(control.clientSide.get(silent=control.silentReload, timeout=control.autoReload))
+
+    valid, process = control.methodHooks(request.method)
+    if valid:
+        with Tracing.span(request, control, valid.__name__):
+            isValid = await resolve(valid(ui, request))
+        if isValid:
+            with Tracing.span(request, control, process.__name__):
+                await resolve(process(ui, request))
+
+    with Tracing.span(request, control, "setUIData"):
+        await resolve(control.setUIData(ui, request))
+    return control._renderUI(ui, request, cacheKey)
@@ -0,0 +1,88 @@
+'''
+    Cache.py
+
+    Defines the caches used to store rendered responses in memory
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+        A thread-safe, size bounded cache that evicts the least recently used entry first and optionally
+        expires entries after a timeout (in seconds)
+    """
+
+    def __init__(self, size=128, timeout=None):
+        self.size = size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+            Returns the value cached for key or default if it is not cached (or has expired)
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+
+            value, expires = entry
+            if expires is not None and expires <= time.time():
+                return default
+
+            self._entries[key] = entry
+            return value
+
+    def set(self, key, value, timeout=None):
+        """
+            Caches value under key - evicting the least recently used entry if the cache is full
+        """
+        timeout = self.timeout if timeout is None else timeout
+        expires = None if timeout is None else time.time() + timeout
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def delete(self, key):
+        """
+            Removes key from the cache if it is present
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+            Removes every entry from the cache
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
@@ -25,8 +25,11 @@ from itertools import chain
 
 from WebElements.All import Factory
 from WebElements import UITemplate
+from WebElements.Base import WebElement
 from WebElements.HiddenInputs import HiddenValue
+from . import HTTP
 from . import PageControls
+from . import Resources
 from .RequestHandler import RequestHandler
 from WebElements.Resources import ResourceFile, ScriptContainer
 
@@ -36,6 +39,16 @@ except ImportError:
     csrf = False
 
 
+class StreamMarker(WebElement):
+    """
+        Marks where the streamed body content will be placed within a document rendered by streamResponse
+    """
+    MARKER = "<!--DynamicForm:Stream-->"
+
+    def toHTML(self, *args, **kwargs):
+        return self.MARKER
+
+
 class DynamicForm(RequestHandler):
     """
         Defines the base dynamic form  - a page made where any section can be updated independently from the rest
@@ -43,6 +56,10 @@ class DynamicForm(RequestHandler):
     template = UITemplate.fromSHPAML("> document")
     elementFactory = Factory
     formatted = False
+    streaming = False # if True GET requests for the page stream the document as each body control finishes rendering
+    inlineHandlerRegistry = False # if True the handler registry is inlined into the page instead of loaded as a script
+    bundleResources = False # if True the resourceFiles found under resourceRoot are served as fingerprinted bundles
+    resourceRoot = None # the directory resourceFiles are relative to - required to bundle them
     resourceFiles = ('js/WebBot.js', 'stylesheets/Site.css')
     if csrf:
         sharedFields = ('csrfmiddlewaretoken', )
@@ -51,24 +68,107 @@ class DynamicForm(RequestHandler):
         """
             Override the response rendering to render the main document structure of the page
         """
+        if self.streaming and request.method == "GET":
+            return self.streamResponse(request)
+
+        document = self.buildDocument(request)
+        document.body += self.mainControl
+        document.body += request.response.scripts
+
+        self.modifyDocument(document, request)
+
+        return document.toHTML(formatted=self.formatted, request=request)
+
+    def streamResponse(self, request):
+        """
+            Renders the document progressively - returning a generator that yields the head (including all resource
+            tags) right away followed by each of the streamControls as they finish rendering
+        """
+        document = self.buildDocument(request)
+        document.body += StreamMarker()
+
+        self.modifyDocument(document, request)
+
+        head, tail = document.toHTML(formatted=self.formatted, request=request).split(StreamMarker.MARKER, 1)
+        return self._stream(request, head, tail)
+
+    def _stream(self, request, head, tail):
+        yield head
+        for control in self.streamControls(request):
+            try:
+                html = control.toHTML(formatted=self.formatted, request=request)
+            except Exception as e: # The response has already started - so the error is rendered in place
+                request.response.status = HTTP.Response.Status.INTERNAL_SERVER_ERROR
+                html = control.renderInternalError(request, e)
+            yield html
+        yield request.response.scripts.toHTML(formatted=self.formatted, request=request)
+        yield tail
+
+    def buildDocument(self, request):
+        """
+            Builds the document structure of the page (before the body content is added)
+        """
         document = self.elementFactory.buildFromTemplate(self.template)
         request.response.scripts =  ScriptContainer()
-        request.response.scripts.addScript("\n".join(self.initScripts))
+        registry, version = self.registryScript()
+        if self.inlineHandlerRegistry:
+            request.response.scripts.addScript(registry)
+        initScripts = "\n".join(script for script in self.initScripts if script)
+        if initScripts:
+            request.response.scripts.addScript(initScripts)
         document.setScriptContainer(request.response.scripts)
         document.setProperty('title', self.title(request))
         document.addChildElement(ResourceFile()).setProperty("file", self.favicon(request))
-        for resourceFile in set(self.requestResourceFiles(request) + self.resourceFiles):
-            document.addChildElement(ResourceFile()).setProperty("file", resourceFile)
+        bundles, resources = self.pageResources()
+        for resource in resources:
+            if type(resource) == Resources.Bundle:
+                resource = self.resourceBundleURL(resource)
+            document.addChildElement(ResourceFile()).setProperty("file", resource)
+        for resourceFile in Resources.unique(self.requestResourceFiles(request)):
+            if resourceFile not in resources and not any(resourceFile in bundle.files for bundle in bundles):
+                document.addChildElement(ResourceFile()).setProperty("file", resourceFile)
+        if not self.inlineHandlerRegistry:
+            document.addChildElement(ResourceFile()).setProperty("file", self.handlerRegistryURL(version))
 
         if csrf:
             token = document.body.addChildElement(HiddenValue('csrfmiddlewaretoken'))
             token.setValue(csrf(request.native)['csrf_token'])
-        document.body += self.mainControl
-        document.body += request.response.scripts
 
-        self.modifyDocument(document, request)
+        return document
 
-        return document.toHTML(formatted=self.formatted, request=request)
+    def pageResources(self):
+        """
+            Returns (bundles, resources) - the resource bundles of the page and everything every request for the page
+            loads (resource files and bundles) deduplicated in the order it was declared. Computed once per class
+        """
+        resources = self.__class__.__dict__.get('_pageResources', None)
+        if resources is None:
+            if self.bundleResources and self.resourceRoot:
+                resources = Resources.bundle(self.resourceFiles, self.resourceRoot)
+            else:
+                resources = ((), Resources.unique(self.resourceFiles))
+            self.__class__._pageResources = resources
+
+        return resources
+
+    def resourceBundleURL(self, bundle):
+        """
+            Returns the url the given resource bundle is loaded from - its name changes with its content
+        """
+        return "?requestHandler=%s&bundle=%s" % (self.resourceBundles.accessor, bundle.name)
+
+    def handlerRegistryURL(self, version):
+        """
+            Returns the url the handler registry script is loaded from - versioned so it can be cached indefinitely
+        """
+        return "?requestHandler=%s&v=%s.js" % (self.handlerRegistry.accessor, version)
+
+    def streamControls(self, request):
+        """
+            Returns the controls that make up the body of the page when streaming - override to stream more than the
+            mainControl
+        """
+        return (self.mainControl, )
 
     def modifyDocument(self, document, request):
         """
@@ -96,6 +196,34 @@ class DynamicForm(RequestHandler):
         """
         return ()
 
+    class HandlerRegistry(RequestHandler):
+        """
+            Serves the script registering every handler of the page client side
+        """
+        def renderResponse(self, request):
+            registry, version = self.parentHandler.registryScript()
+            request.response.contentType = request.response.ContentType.JAVASCRIPT
+            if request.fields.get('v') == version + ".js":
+                request.response.setCacheable()
+            return registry
+
+    class ResourceBundles(RequestHandler):
+        """
+            Serves the fingerprinted resource bundles of the page
+        """
+        CONTENT_TYPES = {'js':HTTP.Response.ContentType.JAVASCRIPT, 'css':HTTP.Response.ContentType.CSS}
+
+        def renderResponse(self, request):
+            name = request.fields.get('bundle')
+            for bundle in self.parentHandler.pageResources()[0]:
+                if bundle.name == name:
+                    request.response.contentType = self.CONTENT_TYPES[bundle.fileType]
+                    request.response.setCacheable()
+                    return bundle.content
+
+            request.response.status = HTTP.Response.Status.NOT_FOUND
+            return self.renderNotFound(request, name)
+
     class MainControl(PageControls.PageControl):
         """
             Override this controller to define how the body of the page should render
@@ -20,15 +20,46 @@
     Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 '''
 
+import copy
+import hashlib
+import threading
 import urllib
+import zlib
 from collections import namedtuple
+from itertools import chain
 from WebElements.MultiplePythonSupport import *
 
+try:
+    from urllib.parse import parse_qsl
+    from http.client import responses as statusPhrases
+    from email.parser import BytesParser
+    parseMessage = BytesParser().parsebytes
+except ImportError as e:
+    from urlparse import parse_qsl
+    from httplib import responses as statusPhrases
+    from email.parser import Parser
+    parseMessage = Parser().parsestr
+
+try:
+    import brotli
+except ImportError as e:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError as e:
+    zstandard = None
+
 try:
     from django.http import HttpResponse as djangoResponse
 except ImportError as e:
     djangoResponse = None
 
+try:
+    from django.http import StreamingHttpResponse as djangoStreamingResponse
+except ImportError as e:
+    djangoStreamingResponse = None
+
 try:
     from google.appengine.api import users as appEngineUsers
 except ImportError as e:
@@ -63,11 +94,45 @@ class Cookie(namedtuple('Cookie', ['key', 'value', 'maxAge', 'expires', 'path',
         return ";".join(value)
 
 
+class UploadedFile(namedtuple('UploadedFile', ['name', 'fileName', 'contentType', 'content'])):
+    """
+        Defines a file uploaded as part of a multipart/form-data request body
+    """
+    __slots__ = ()
+
+
 class FieldDict(dict):
     """
         Adds convenience methods to the basic python dictionary specific to HTTP field dictionaries
     """
 
+    @classmethod
+    def fromPairs(cls, pairs):
+        """
+            Creates a field dictionary from (field, value) pairs in a single pass - fields that are repeated become a
+            list of their values
+        """
+        fields = cls()
+        repeated = {}
+        for field, value in pairs:
+            if dict.__contains__(fields, field):
+                values = repeated.get(field, None)
+                if values is None:
+                    values = repeated[field] = [dict.__getitem__(fields, field)]
+                    dict.__setitem__(fields, field, values)
+                values.append(value)
+            else:
+                dict.__setitem__(fields, field, value)
+
+        return fields
+
+    @classmethod
+    def fromLists(cls, items):
+        """
+            Creates a field dictionary from (field, listOfValues) items - fields with a single value store it directly
+        """
+        return cls((field, values[0] if len(values) == 1 else list(values)) for field, values in items)
+
     def get(self, field, default=''):
         """
             Overwrites dict behavior to return empty string by default - to be more consistent with browser behavior
@@ -120,6 +185,18 @@ class FieldDict(dict):
             return defaultValue
         return field
 
+    def add(self, field, value):
+        """
+            Adds a value for a field - turning the field into a list of values if it is already set
+        """
+        current = dict.get(self, field, self)
+        if current is self:
+            self[field] = value
+        elif type(current) == list:
+            current.append(value)
+        else:
+            self[field] = [current, value]
+
     def subset(self, fields, default=''):
         """
             Returns a subset of itself based on a list of fields
@@ -145,11 +222,161 @@ class FieldDict(dict):
         return "&".join(params)
 
 
+class SharedFieldDict(FieldDict):
+    """
+        A FieldDict made from another field dictionary for a copy of a request or response: it takes its own
+        (shallow) copy of the dictionary up front - so it is complete even to code that reads the dict storage
+        directly (such as json.dumps) - and changes to it never reach the dictionary it was made from
+    """
+    __slots__ = ()
+
+    def __init__(self, shared=None):
+        FieldDict.__init__(self, shared or ())
+
+    def add(self, field, value):
+        current = dict.get(self, field, self)
+        if current is self:
+            self[field] = value
+        else: # never appended to in place - the list may still be shared with the original
+            self[field] = (list(current) if type(current) == list else [current]) + [value]
+
+
+class FieldView(FieldDict):
+    """
+        A copy-on-write view of a field dictionary that is safe to hand to code that may modify it (such as
+        WebElement.insertVariables): top level changes stay within the view, and mutable values (lists of values)
+        are copied the first time they are accessed through the view - instead of deep copying every field up front
+    """
+    __slots__ = ('_copied', )
+    MUTABLE_TYPES = (list, dict, set)
+
+    def __init__(self, fields=None):
+        FieldDict.__init__(self, fields or ())
+        self._copied = set()
+
+    def _value(self, field, value):
+        if type(value) in self.MUTABLE_TYPES and field not in self._copied:
+            value = copy.deepcopy(value)
+            dict.__setitem__(self, field, value)
+            self._copied.add(field)
+        return value
+
+    def get(self, field, default=''):
+        value = dict.get(self, field, self)
+        if value is self:
+            return default
+        return self._value(field, value)
+
+    def __getitem__(self, field):
+        return self._value(field, dict.__getitem__(self, field))
+
+    def values(self):
+        return [self[field] for field in self]
+
+    def items(self):
+        return [(field, self[field]) for field in self]
+
+    def copy(self):
+        return self.__class__(self)
+
+    def __setitem__(self, field, value):
+        dict.__setitem__(self, field, value)
+        self._copied.add(field)
+
+    def setdefault(self, field, default=None):
+        if field in self:
+            return self[field]
+        self[field] = default
+        return default
+
+    def pop(self, field, *default):
+        if field not in self:
+            return dict.pop(self, field, *default)
+
+        value = self[field]
+        dict.pop(self, field)
+        self._copied.discard(field)
+        return value
+
+    def popitem(self):
+        for field in self:
+            return (field, self.pop(field))
+        raise KeyError("popitem(): dictionary is empty")
+
+    def clear(self):
+        dict.clear(self)
+        self._copied.clear()
+
+
+def gzipCompress(content, level):
+    """
+        Returns content compressed in the gzip format
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(content) + compressor.flush()
+
+
+def brotliCompress(content, level):
+    """
+        Returns content compressed in the brotli format (brotli qualities go from 0 to 11)
+    """
+    return brotli.compress(content, quality=min(level, 11))
+
+
+def zstdCompress(content, level):
+    """
+        Returns content compressed in the zstd format
+    """
+    return zstandard.ZstdCompressor(level=level).compress(content)
+
+
+def parseQueryString(queryString, fields):
+    """
+        Adds the fields defined in a query string (or urlencoded body) to the given FieldDict - returning it
+    """
+    pairs = parse_qsl(queryString, keep_blank_values=True)
+    if not fields:
+        fields.update(FieldDict.fromPairs(pairs))
+        return fields
+
+    for field, value in pairs:
+        fields.add(field, value)
+    return fields
+
+
+def parseMultipart(body, contentType, fields, files):
+    """
+        Adds the fields and files defined in a multipart/form-data body to the given FieldDicts
+    """
+    message = parseMessage(b"Content-Type: " + contentType.encode('latin-1') + b"\r\n\r\n" + body)
+    if not message.is_multipart():
+        return
+
+    for part in message.get_payload():
+        name = part.get_param('name', header='content-disposition')
+        if name is None:
+            continue
+
+        content = part.get_payload(decode=True) or b""
+        fileName = part.get_filename()
+        if fileName is None:
+            fields.add(name, content.decode(part.get_content_charset() or 'utf8', 'replace'))
+        else:
+            files.add(name, UploadedFile(name, fileName, part.get_content_type(), content))
+
+
+STRING_TYPES = (bytes, type(u''))
+COMPRESSORS = tuple((encoding, compressor) for encoding, compressor, available in
+                    (('br', brotliCompress, brotli), ('zstd', zstdCompress, zstandard), ('gzip', gzipCompress, True))
+                    if available) # In order of preference
+
+
 class Response(object):
     """
         Defines the abstract concept of an HTTP response
     """
-    __slots__ = ('content', 'status', 'contentType', '_headers', 'cookies', 'scripts', 'charset')
+    __slots__ = ('content', 'status', 'contentType', '_headers', '_cookies', 'scripts', 'charset', 'encodingCache',
+                 'isDynamic')
 
     class Status(object):
         """
@@ -243,24 +470,65 @@ class Response(object):
         VCARD = "text/vcard"
         XML = "text/xml"
 
+    NO_CACHE_HEADERS = {'Cache-Control':'no-cache, must-revalidate', 'Pragma':'no-cache',
+                        'Expires':'Thu, 01 DEC 1994 01:00:00 GMT'} # shared by every dynamic response - never modified
+
     def __init__(self, content='', contentType=None, status=None, charset="UTF-8", isDynamic=True):
         self.content = content
         self.contentType = contentType or self.ContentType.HTML
         self.charset = charset
         self.status = status or self.Status.OK
-        self.cookies = FieldDict({})
-        self._headers = {}
+        self._cookies = None
+        self._headers = None # Only the headers set on this response (None marks a removed default header)
         self.scripts = None
-        if isDynamic: # If content is dynamically generated (and it almost always is) don't let the browser cache
-            self['Cache-Control'] = 'no-cache, must-revalidate'
-            self['Pragma'] = 'no-cache'
-            self['Expires'] = 'Thu, 01 DEC 1994 01:00:00 GMT' # Some time in the past
+        self.encodingCache = None # When set compressed content is stored and reused from this cache (by digest)
+        # If content is dynamically generated (and it almost always is) the NO_CACHE_HEADERS are sent unless overridden
+        self.isDynamic = isDynamic
+
+    @property
+    def cookies(self):
+        """
+            The cookies set on the response - created the first time they are needed
+        """
+        if self._cookies is None:
+            self._cookies = FieldDict()
+        return self._cookies
+
+    @cookies.setter
+    def cookies(self, cookies):
+        self._cookies = cookies
+
+    def headers(self):
+        """
+            Returns every header of the response as a new dictionary - the default headers merged with the ones set
+        """
+        headers = dict(self.NO_CACHE_HEADERS) if self.isDynamic else {}
+        for header, value in iteritems(self._headers or {}):
+            if value is None:
+                headers.pop(header, None)
+            else:
+                headers[header] = value
+        return headers
 
     def get(self, header, default=None):
         """
             Returns header value if it exists or default
         """
-        return self._headers.get(header, default)
+        value = self._headers.get(header, self) if self._headers else self
+        if value is self and self.isDynamic:
+            value = self.NO_CACHE_HEADERS.get(header, self)
+        if value is self or value is None:
+            return default
+        return value
+
+    def setCacheable(self, maxAge=31536000):
+        """
+            Allows browsers and proxies to cache the response for maxAge seconds (defaults to a year) - replacing the
+            no-cache headers dynamic responses start with
+        """
+        self['Cache-Control'] = 'public, max-age=%d' % maxAge
+        del self['Pragma']
+        del self['Expires']
 
     def setCookie(self, key, value='', maxAge=None, expires=None, path='/', domain=None, secure=False,
                     httpOnly=False):
@@ -275,28 +543,90 @@ class Response(object):
         """
             Implement __setItem__ to support dict like setting of headers right on the request object
         """
+        if self._headers is None:
+            self._headers = {}
         self._headers[header] = value
 
     def __delitem__(self, header):
         """
             Implement __delItem__ to support dict like deleting of headers right on the request object
         """
-        try:
+        if self.isDynamic and header in self.NO_CACHE_HEADERS:
+            self[header] = None
+        elif self._headers and header in self._headers:
             del self._headers[header]
-        except KeyError:
-            pass
 
     def __getitem__(self, header):
         """
             Implement __getItem__ to support dict like deleting of headers on the request object
         """
-        return self._headers[header]
+        value = self.get(header, self)
+        if value is self:
+            raise KeyError(header)
+        return value
+
+    def copy(self):
+        """
+            Returns a copy of the response - with its own (shallow) copies of the header and cookie dictionaries
+        """
+        copy = self.__class__.__new__(self.__class__)
+        copy.content = self.content
+        copy.status = self.status
+        copy.contentType = self.contentType
+        copy.charset = self.charset
+        copy.scripts = self.scripts
+        copy.encodingCache = self.encodingCache
+        copy.isDynamic = self.isDynamic
+        copy._headers = self._headers is not None and SharedFieldDict(self._headers) or None
+        copy._cookies = self._cookies is not None and SharedFieldDict(self._cookies) or None
+        return copy
+
+    def compress(self, acceptedEncodings, level=6, minimumSize=1024):
+        """
+            Compresses the content using the most preferred compression the client accepts
+            (as returned by Request.acceptedEncodings) - returning the encoding used or None if left uncompressed
+        """
+        content = self.content
+        if not isinstance(content, STRING_TYPES) or len(content) < minimumSize or self.get('Content-Encoding'):
+            return None
+
+        for encoding, compressor in COMPRESSORS:
+            if acceptedEncodings.get(encoding, acceptedEncodings.get('*', 0)) > 0:
+                break
+        else:
+            return None
+
+        if not isinstance(content, bytes):
+            content = content.encode(self.charset)
+        compressed = cacheKey = None
+        if self.encodingCache is not None:
+            cacheKey = (encoding, level, hashlib.sha1(content).digest())
+            compressed = self.encodingCache.get(cacheKey)
+        if compressed is None:
+            compressed = compressor(content, level)
+            if cacheKey is not None:
+                self.encodingCache.set(cacheKey, compressed)
+
+        self.content = compressed
+        self['Content-Encoding'] = encoding
+        self['Vary'] = 'Accept-Encoding'
+        etag = self.get('ETag')
+        if etag and not etag.startswith("W/"): # the same entity tag now covers each encoding of the content
+            self['ETag'] = "W/" + etag
+        return encoding
 
     def serialize(self):
         """
             Returns a plain dictionary of the response for serialization purposes.
         """
-        return {'responseText':self.content, 'status':self.status, 'contentType':self.contentType}
+        content = self.content
+        if not isinstance(content, STRING_TYPES): # Streamed content
+            content = "".join(content)
+        serialized = {'responseText':content, 'status':self.status, 'contentType':self.contentType}
+        etag = self.get('ETag')
+        if etag is not None:
+            serialized['etag'] = etag
+        return serialized
 
     def toAppEngineResponse(self, response):
         """
@@ -306,59 +636,183 @@ class Response(object):
         response.set_status(self.status)
         response.headers.add('Content-Type', self.contentType + ";charset=" + self.charset)
 
-        for header, value in iteritems(self._headers):
+        for header, value in iteritems(self.headers()):
             response.headers.add(header, value)
 
-        for cookie in itervalues(self.cookies):
+        for cookie in itervalues(self._cookies or {}):
             response.headers.add('Set-Cookie', cookie.toHeader())
 
-    def toDjangoResponse(self, cls=djangoResponse):
+    def toWSGI(self, startResponse):
+        """
+            Passes the status and headers of this response to a WSGI start_response callable - returning the body
+        """
+        content = self.content
+        headers = self.headerList()
+        if isinstance(content, STRING_TYPES):
+            content = [self._encode(content)]
+            headers.append(('Content-Length', str(len(content[0]))))
+        else:
+            content = (self._encode(chunk) for chunk in content)
+
+        startResponse("%d %s" % (self.status, statusPhrases.get(self.status, "Unknown")), headers)
+        return content
+
+    def headerList(self):
+        """
+            Returns every header of the response (content type and cookies included) as a list of (name, value) pairs
+        """
+        headers = [('Content-Type', self.contentType + ";charset=" + self.charset)]
+        headers.extend((header, str(value)) for header, value in iteritems(self.headers()))
+        headers.extend(('Set-Cookie', cookie.toHeader()) for cookie in itervalues(self._cookies or {}))
+        return headers
+
+    def _encode(self, content):
+        if isinstance(content, bytes):
+            return content
+        return content.encode(self.charset)
+
+    def toDjangoResponse(self, cls=djangoResponse, streamingCls=djangoStreamingResponse):
         """
             Converts the given response to the Django HTTPResponse object
             cls - the django HTTPResponse class or compatible object type
+            streamingCls - the django StreamingHttpResponse class or compatible type used when content is streamed
         """
+        if not isinstance(self.content, STRING_TYPES):
+            cls = streamingCls
         djangoResponse = cls(self.content, self.contentType + ";charset=" + self.charset, self.status)
-        for header, value in iteritems(self._headers):
+        for header, value in iteritems(self.headers()):
             djangoResponse[header] = value
 
-        for cookie in itervalues(self.cookies):
+        for cookie in itervalues(self._cookies or {}):
             djangoResponse.set_cookie(*cookie)
 
         return djangoResponse
 
 
+class Lazy(object):
+    """
+        A value that is only loaded (by calling load with the given arguments) the first time it is needed -
+        exactly once, even when it is first needed by several threads at the same time. Each pending value has
+        its own lock (dropped once loaded) so loading one never holds up requests loading others
+    """
+    __slots__ = ('load', 'args', 'value', 'lock')
+
+    def __init__(self, load, *args):
+        self.load = load
+        self.args = args
+        self.value = None
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        lock = self.lock
+        if lock is not None:
+            with lock:
+                if self.load is not None:
+                    self.value = self.load(*self.args)
+                    self.load = self.args = None
+            self.lock = None
+        return self.value
+
+
+class LazyAttribute(object):
+    """
+        An attribute that can be set to a Lazy value - which is loaded the first time the attribute is read.
+        If a default is given and the attribute is None it is set to default() the first time it is read
+    """
+    __slots__ = ('storage', 'default')
+
+    def __init__(self, name, default=None):
+        self.storage = "_" + name
+        self.default = default
+
+    def __get__(self, instance, instanceClass=None):
+        if instance is None:
+            return self
+
+        value = getattr(instance, self.storage)
+        if type(value) == Lazy:
+            value = value()
+            setattr(instance, self.storage, value)
+        elif value is None and self.default is not None:
+            value = self.default()
+            setattr(instance, self.storage, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.storage, value)
+
+
+def fieldDict(fields):
+    """
+        Returns the given fields as a FieldDict - leaving Lazy fields to be loaded and empty fields to be created
+        when first accessed
+    """
+    if type(fields) in (FieldDict, Lazy):
+        return fields
+    return fields and FieldDict(fields) or None
+
+
 class Request(object):
     """
         Defines the abstract concept of an HTTP request
     """
+    __slots__ = ('_fields', '_body', '_cookies', '_meta', '_files', '_response', 'path', 'user', 'native', 'method',
+                 'permissions', 'span')
+    FIELD_DICTS = ('_fields', '_cookies', '_meta', '_files')
+    fields = LazyAttribute('fields', FieldDict)
+    body = LazyAttribute('body')
+    cookies = LazyAttribute('cookies', FieldDict)
+    meta = LazyAttribute('meta', FieldDict)
+    files = LazyAttribute('files', FieldDict)
+    response = LazyAttribute('response', Response)
 
     def __init__(self, fields=None, body="", cookies=None, meta=None, files=None, path=None, method=None, user=None,
                  native=None):
-        self.fields = FieldDict(fields or {})
+        self.fields = fieldDict(fields)
         self.body = body
-        self.cookies = FieldDict(cookies or {})
-        self.meta = FieldDict(meta or {})
-        self.files = FieldDict(files or {})
+        self.cookies = fieldDict(cookies)
+        self.meta = fieldDict(meta)
+        self.files = fieldDict(files)
         self.path = path or ""
         self.user = user
         self.native = native
         self.method = method
-        self.response = Response()
+        self.response = None
+        self.permissions = {} # (permission, handler accessor) -> allowed - shared with copies of the request
+        self.span = None # the Tracing span currently open for this request (None when it is not being traced)
+
+    def _shallowCopy(self):
+        copy = self.__class__.__new__(self.__class__)
+        for requestClass in self.__class__.__mro__:
+            for attribute in requestClass.__dict__.get('__slots__', ()):
+                if attribute not in ('__dict__', '__weakref__') and hasattr(self, attribute):
+                    setattr(copy, attribute, getattr(self, attribute))
+        if hasattr(self, '__dict__'):
+            copy.__dict__.update(self.__dict__)
+        return copy
+
+    def __copy__(self):
+        """
+            Returns a shallow copy of the request - sharing its field dictionaries and response with it
+        """
+        self.response # created now so that it is shared
+        return self._shallowCopy()
 
     def copy(self):
         """
-            Returns a smart copy of the request object
-        """
-        copy =  self.__class__(fields=self.fields.copy(), body=self.body, cookies=self.cookies.copy(),
-                               meta=self.meta.copy(), files=self.files.copy(), path=self.path, method=self.method,
-                               user=self.user, native=self.native)
-        copy.response.content = self.response.content
-        copy.response.status = self.response.status
-        copy.response.contentType = self.response.contentType
-        copy.response._headers = self.response._headers.copy()
-        copy.response.cookies = self.response.cookies.copy()
-        copy.response.scripts = self.response.scripts
-        copy.response.charset = self.response.charset
+            Returns a smart copy of the request object - it is given its own response, and each of its field
+            dictionaries (including ones not loaded yet) is only copied the first time the copy reads it
+        """
+        copy = self._shallowCopy()
+        for storage in self.FIELD_DICTS:
+            value = getattr(self, storage)
+            if type(value) == Lazy:
+                value = Lazy(lambda pending: SharedFieldDict(pending()), value)
+            elif value is not None:
+                value = Lazy(SharedFieldDict, value)
+            setattr(copy, storage, value)
+        if self._response is not None:
+            copy._response = self._response.copy()
         return copy
 
     def isAjax(self):
@@ -367,36 +821,105 @@ class Request(object):
         """
         return self.meta.get('HTTP_X_REQUESTED_WITH') == 'XMLHttpRequest'
 
-    @classmethod
-    def fromAppEngineRequest(cls, appEngineRequest, method="GET"):
-        fields = {}
-        for name in appEngineRequest.arguments():
-            value = appEngineRequest.get_all(name)
-            if len(value) == 1:
-                value = value[0]
-            fields[name] = value
+    def ifNoneMatch(self):
+        """
+            Returns the set of entity tags the client sent in the If-None-Match header (weak tags compare as strong)
+        """
+        header = self.meta.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return set()
+
+        tags = set()
+        for tag in header.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            tags.add(tag)
+        return tags
+
+    def acceptedEncodings(self):
+        """
+            Returns a dictionary of the content encodings the client accepts (from Accept-Encoding) to their q-value
+        """
+        encodings = {}
+        for encoding in self.meta.get('HTTP_ACCEPT_ENCODING').split(","):
+            encoding, separator, parameters = encoding.strip().partition(";")
+            if not encoding:
+                continue
 
-        return cls(fields, appEngineRequest.body, dict(appEngineRequest.cookies), None, None, appEngineRequest.path,
-                   method, user=appEngineUsers.get_current_user(), native=appEngineRequest)
+            quality = 1.0
+            parameters = parameters.strip()
+            if parameters.startswith("q="):
+                try:
+                    quality = float(parameters[2:])
+                except ValueError:
+                    quality = 0.0
+            encodings[encoding.lower()] = quality
+        return encodings
 
+    @classmethod
+    def fromWSGIEnviron(cls, environ):
+        """
+            Creates a new request object directly from a WSGI environ - parsing the query string and any
+            urlencoded or multipart body itself
+        """
+        method = environ.get('REQUEST_METHOD', 'GET').upper()
+        fields = FieldDict()
+        files = FieldDict()
+
+        body = b""
+        try:
+            contentLength = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            contentLength = 0
+        if contentLength:
+            body = environ['wsgi.input'].read(contentLength)
+
+        contentType = environ.get('CONTENT_TYPE', '')
+        if body and contentType.startswith('application/x-www-form-urlencoded'):
+            parseQueryString(body.decode('utf8', 'replace'), fields)
+        elif body and contentType.startswith('multipart/form-data'):
+            parseMultipart(body, contentType, fields, files)
+        fields.update(FieldDict.fromPairs(parse_qsl(environ.get('QUERY_STRING', ''), keep_blank_values=True)))
+
+        cookies = {}
+        for cookie in environ.get('HTTP_COOKIE', '').split(";"):
+            key, separator, value = cookie.strip().partition("=")
+            if key:
+                cookies[key] = value
+
+        path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+        return cls(fields, body, cookies, environ, files, path, method, user=environ.get('REMOTE_USER'),
+                   native=environ)
 
+    @classmethod
+    def fromAppEngineRequest(cls, appEngineRequest, method="GET"):
+        """
+            Creates a new request object from an AppEngine request - its fields, body, cookies and meta data are only
+            converted when first accessed
+        """
+        fields = Lazy(lambda: FieldDict.fromLists((name, appEngineRequest.get_all(name))
+                                                  for name in appEngineRequest.arguments()))
+        return cls(fields, Lazy(getattr, appEngineRequest, 'body'), Lazy(lambda: FieldDict(appEngineRequest.cookies)),
+                   Lazy(FieldDict, appEngineRequest.environ), None, appEngineRequest.path, method,
+                   user=appEngineUsers.get_current_user(), native=appEngineRequest)
 
     @classmethod
     def fromDjangoRequest(cls, djangoRequest):
         """
-            Creates a new request object from a Django request object
-        """
-        if djangoRequest.method in ['PUT', 'DELETE']:
-            oldMethod = djangoRequest.method
-            djangoRequest.method = "POST"
-            djangoRequest._load_post_and_files()
-            djangoRequest.method = oldMethod
-        fields = dict(djangoRequest.POST)
-        fields.update(dict(djangoRequest.GET))
-        for key, value in iteritems(fields):
-            if type(value) in (tuple, list) and len(value) == 1:
-                fields[key] = value[0]
-
-        return cls(fields, djangoRequest.body, djangoRequest.COOKIES, djangoRequest.META, djangoRequest.FILES,
-                   djangoRequest.path, djangoRequest.method, user=djangoRequest.user, native=djangoRequest)
+            Creates a new request object from a Django request object - its fields, body, cookies, meta data and
+            files are only converted when first accessed
+        """
+        def data(attribute):
+            if djangoRequest.method in ['PUT', 'DELETE'] and not hasattr(djangoRequest, '_post'):
+                oldMethod = djangoRequest.method
+                djangoRequest.method = "POST"
+                djangoRequest._load_post_and_files()
+                djangoRequest.method = oldMethod
+            return getattr(djangoRequest, attribute)
+
+        fields = Lazy(lambda: FieldDict.fromLists(chain(data('POST').lists(), data('GET').lists())))
+        return cls(fields, Lazy(getattr, djangoRequest, 'body'), Lazy(lambda: FieldDict(djangoRequest.COOKIES)),
+                   Lazy(FieldDict, djangoRequest.META), Lazy(lambda: FieldDict(data('FILES'))), djangoRequest.path,
+                   djangoRequest.method, user=djangoRequest.user, native=djangoRequest)
 
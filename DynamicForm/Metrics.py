@@ -0,0 +1,171 @@
+'''
+    Metrics.py
+
+    Defines a registry of the request count, error count, latency and response size of every handler - along with
+    a request handler that reports them in the Prometheus text format or as JSON
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import json
+import threading
+from bisect import bisect_left
+
+from . import HTTP
+from .RequestHandler import RequestHandler
+from WebElements.MultiplePythonSupport import *
+
+UNKNOWN = "unknown" # the accessor requests that did not resolve to a handler are recorded under
+ERRORS = {HTTP.Response.Status.INTERNAL_SERVER_ERROR:'internalError', HTTP.Response.Status.UNAUTHORIZED:'unauthorized',
+          HTTP.Response.Status.NOT_FOUND:'notFound'}
+
+
+class HandlerMetrics(object):
+    """
+        Defines the metrics recorded for a single handler
+    """
+    __slots__ = ('statuses', 'errors', 'buckets', 'seconds', 'bytes', 'sized')
+
+    def __init__(self, buckets):
+        self.statuses = {}
+        self.errors = {}
+        self.buckets = [0] * (len(buckets) + 1) # the last bucket counts the responses slower than every bound
+        self.seconds = 0.0
+        self.bytes = 0
+        self.sized = 0
+
+    def count(self):
+        return sum(self.buckets)
+
+    def toDict(self, buckets):
+        cumulative = 0
+        latency = []
+        for bound, count in zip(buckets + ("+Inf", ), self.buckets):
+            cumulative += count
+            latency.append((bound, cumulative))
+
+        return {'requests':dict((str(status), count) for status, count in iteritems(self.statuses)),
+                'errors':dict(self.errors), 'latency':{'buckets':latency, 'sum':self.seconds, 'count':cumulative},
+                'bytes':{'sum':self.bytes, 'count':self.sized}}
+
+
+class Registry(object):
+    """
+        A thread-safe registry of the metrics of every handler - fed by RequestHandler.handleRequest when it is set as
+        the metrics of the root handler
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # latency histogram bounds in seconds
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._handlers = {}
+        self._lock = threading.Lock()
+
+    def record(self, accessor, status, seconds, size=None):
+        """
+            Records a response of the handler with the given accessor (None if the handler was not found) and its
+            size (None if unknown)
+        """
+        bucket = bisect_left(self.buckets, seconds)
+        error = ERRORS.get(status, None)
+        with self._lock:
+            metrics = self._handlers.get(accessor or UNKNOWN, None)
+            if metrics is None:
+                metrics = self._handlers[accessor or UNKNOWN] = HandlerMetrics(self.buckets)
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            if error:
+                metrics.errors[error] = metrics.errors.get(error, 0) + 1
+            metrics.buckets[bucket] += 1
+            metrics.seconds += seconds
+            if size is not None:
+                metrics.bytes += size
+                metrics.sized += 1
+
+    def reset(self):
+        """
+            Forgets everything recorded so far
+        """
+        with self._lock:
+            self._handlers = {}
+
+    def snapshot(self):
+        """
+            Returns a consistent copy of the recorded metrics as a dictionary of handler accessor -> metrics
+        """
+        with self._lock:
+            return dict((accessor, metrics.toDict(self.buckets)) for accessor, metrics in iteritems(self._handlers))
+
+    def toJSON(self):
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def toPrometheus(self):
+        """
+            Returns the recorded metrics in the Prometheus text exposition format
+        """
+        snapshot = self.snapshot()
+        handlers = sorted(snapshot)
+        lines = ["# HELP dynamicform_requests_total Responses rendered by handler and status",
+                 "# TYPE dynamicform_requests_total counter"]
+        for accessor in handlers:
+            for status, count in sorted(iteritems(snapshot[accessor]['requests'])):
+                lines.append('dynamicform_requests_total{handler="%s",status="%s"} %d' % (accessor, status, count))
+
+        lines.extend(("# HELP dynamicform_errors_total Internal error, unauthorized and not found responses by handler",
+                      "# TYPE dynamicform_errors_total counter"))
+        for accessor in handlers:
+            for error, count in sorted(iteritems(snapshot[accessor]['errors'])):
+                lines.append('dynamicform_errors_total{handler="%s",error="%s"} %d' % (accessor, error, count))
+
+        lines.extend(("# HELP dynamicform_request_seconds Time taken to render responses by handler",
+                      "# TYPE dynamicform_request_seconds histogram"))
+        for accessor in handlers:
+            latency = snapshot[accessor]['latency']
+            for bound, count in latency['buckets']:
+                lines.append('dynamicform_request_seconds_bucket{handler="%s",le="%s"} %d' % (accessor, bound, count))
+            lines.append('dynamicform_request_seconds_sum{handler="%s"} %r' % (accessor, latency['sum']))
+            lines.append('dynamicform_request_seconds_count{handler="%s"} %d' % (accessor, latency['count']))
+
+        lines.extend(("# HELP dynamicform_response_bytes Size of the rendered responses by handler",
+                      "# TYPE dynamicform_response_bytes summary"))
+        for accessor in handlers:
+            size = snapshot[accessor]['bytes']
+            lines.append('dynamicform_response_bytes_sum{handler="%s"} %d' % (accessor, size['sum']))
+            lines.append('dynamicform_response_bytes_count{handler="%s"} %d' % (accessor, size['count']))
+
+        return "\n".join(lines) + "\n"
+
+
+class StatsHandler(RequestHandler):
+    """
+        Reports the metrics recorded by the root handler's registry - in the Prometheus text format or, when the
+        format field is json, as JSON. Nest a subclass of it within the root handler to expose it
+        (override canView to restrict who can see it)
+    """
+    PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+    def renderResponse(self, request):
+        registry = self.rootHandler.metrics
+        if registry is None:
+            request.response.status = HTTP.Response.Status.NOT_FOUND
+            return self.renderNotFound(request, self.accessor)
+
+        if request.fields.get('format') == "json":
+            request.response.contentType = HTTP.Response.ContentType.JSON
+            return registry.toJSON()
+
+        request.response.contentType = self.PROMETHEUS_CONTENT_TYPE
+        return registry.toPrometheus()
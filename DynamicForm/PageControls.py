@@ -24,6 +24,8 @@ import re
 import copy
 
 from . import HTTP
+from . import Tracing
+from .Cache import LRUCache
 from .RequestHandler import RequestHandler
 from WebElements import UITemplate
 from WebElements.All import Factory
@@ -35,6 +37,25 @@ from WebElements.Resources import ScriptContainer
 from WebElements.StringUtils import scriptURL
 from WebElements.Containers import PageControlPlacement
 from WebElements import ClientSide
+from WebElements.MultiplePythonSupport import *
+
+templatePrototypes = {} # (id(template), id(factory)) -> (template, factory, prototype element)
+templateSegments = {} # (control class, id(factory)) -> (factory, compiled segments or None)
+
+
+class SegmentMarker(WebElement):
+    """
+        Stands in for a dynamic element when a template is compiled into static segments
+    """
+    MARKER = "<!--DynamicForm:Segment:%d-->"
+    SPLIT = re.compile("<!--DynamicForm:Segment:(\\d+)-->")
+
+    def __init__(self, index):
+        WebElement.__init__(self)
+        self.index = index
+
+    def toHTML(self, *args, **kwargs):
+        return self.MARKER % self.index
 
 
 class PageControl(RequestHandler, WebElement):
@@ -48,6 +69,17 @@ class PageControl(RequestHandler, WebElement):
     autoReload = False
     silentReload = True
     elementFactory = Factory
+    cacheTimeout = None # seconds a rendered GET response is cached for (None disables caching)
+    cacheVaryBy = None # the request fields cached responses vary by (defaults to grabFields)
+    cacheVaryByUser = False # if True the requesting user is part of what cached responses vary by
+    cacheSize = 128 # the maximum number of rendered responses cached per control class
+    TREE_ATTRIBUTES = ('childHandlers', 'initScripts', '_routes', 'autoRegister') # shared with instances of a control
+    COPIED_TYPES = (list, dict, set) # the types of the other attributes instances get their own copy of
+    showLoading = True # if False no loading placeholder is rendered (for controls that only ever reload silently)
+    LOADING_ID = "DynamicFormLoadingId"
+    LOADING_NAME = "DynamicFormLoadingName"
+    METHOD_HOOKS = {'GET':('validGet', 'processGet'), 'POST':('validPost', 'processPost'),
+                    'DELETE':('validDelete', 'processDelete'), 'PUT':('validPut', 'processPut')}
 
     class ClientSide(WebElement.ClientSide):
 
@@ -100,14 +132,15 @@ class PageControl(RequestHandler, WebElement):
             self.elementFactory = parentHandler.elementFactory
 
         RequestHandler.__init__(self, parentHandler=parentHandler, initScripts=initScripts)
+        self.initScripts.append(self._initElement(id, name, request, **kwargs).content())
+
+    def _initElement(self, id, name, request, **kwargs):
         WebElement.__init__(self, id=id or self.accessor, name=name, parent=None, **kwargs)
         self.setPrefix("")
         self.attributes['handler'] = self.accessor
         self.request = request
 
-        self._loading = self.Loading(self.id + ":Loading", self.name + ":Loading", parent=self, hide=True).toHTML()
-
-        self.initScripts.append(self.setScriptContainer(ScriptContainer()).content())
+        return self.setScriptContainer(ScriptContainer())
 
     def __call__(self, id, request, method="GET", autoLoad=None, autoReload=None, silentReload=None, **kwargs):
         """
@@ -119,10 +152,11 @@ class PageControl(RequestHandler, WebElement):
         if kwargs:
             request.fields = HTTP.FieldDict(request.fields.copy())
             request.fields.update(kwargs)
+            request.permissions = {}
 
         id = self.accessor + str(id)
         request.fields['requestID'] = id
-        instance = self.__class__(id=id, request=request, parentHandler=self.parentHandler)
+        instance = self.instance(id, request)
         if autoLoad is not None:
             instance.autoLoad = autoLoad
         if autoReload is not None:
@@ -131,6 +165,22 @@ class PageControl(RequestHandler, WebElement):
             instance.silentReload = silentReload
         return instance
 
+    def instance(self, id, request):
+        """
+            Returns a lightweight instance of this control for the given id and request - sharing this control's
+            handler tree (child handlers, specs, connections) instead of constructing and registering a new one.
+            NOTE: __init__ is not run again for the instance - it starts from this control's attributes, with its own
+            (shallow) copy of every list, dict and set among them except the TREE_ATTRIBUTES
+        """
+        instance = self.__class__.__new__(self.__class__)
+        attributes = instance.__dict__
+        for name, value in iteritems(self.__dict__):
+            if type(value) in self.COPIED_TYPES and name not in self.TREE_ATTRIBUTES:
+                value = copy.copy(value)
+            attributes[name] = value
+        instance._initElement(id, None, request)
+        return instance
+
     def instanceID(self, salt="", element=""):
         """
             Returns what the instance ID would be for this controller or sub element given the provided salt value
@@ -144,6 +194,30 @@ class PageControl(RequestHandler, WebElement):
         """
         return "Loading %s..." % (self.__class__.__name__, )
 
+    @classmethod
+    def loadingTemplate(cls, control):
+        """
+            Returns the loading placeholder html for this class of control with the id and name left as slots -
+            the Loading element is only built and rendered the first time a control of this class is drawn
+        """
+        template = cls.__dict__.get('_loadingTemplate')
+        if template is None:
+            template = cls.Loading(cls.LOADING_ID + ":Loading", cls.LOADING_NAME + ":Loading", parent=control,
+                                   hide=True).toHTML()
+            cls._loadingTemplate = template
+
+        return template
+
+    @property
+    def _loading(self):
+        """
+            The loading placeholder html for this specific control instance
+        """
+        if not self.showLoading:
+            return ""
+
+        return self.loadingTemplate(self).replace(self.LOADING_ID, self.id).replace(self.LOADING_NAME, self.name)
+
     def toHTML(self, formatted=False, *args, **kwargs):
         """
             Override toHTML to draw loading section in addition to controller placement
@@ -188,40 +262,121 @@ class PageControl(RequestHandler, WebElement):
 
     def renderResponse(self, request):
         request = self.request or request
+        self._setRequestID(request)
+        cacheKey = self.cacheKey(request)
+        if cacheKey is not None:
+            request.response.encodingCache = self.encodingCache()
+            cached = self.fragmentCache().get(cacheKey)
+            if cached is not None:
+                return cached
+
+        with Tracing.span(request, self, "buildUI"):
+            ui = self._synchronous('buildUI', self.buildUI(request))
+        with Tracing.span(request, self, "initUI"):
+            self._synchronous('initUI', self.initUI(ui, request))
+        self._modifyUI(ui, request)
+        if request.method != "GET":
+            with Tracing.span(request, self, "populateUI"):
+                self._synchronous('populateUI', self.populateUI(ui, request))
+        if self.autoReload:
+            ui.clientSide(self.clientSide.get(silent=self.silentReload, timeout=self.autoReload))
+
+        valid, process = self.methodHooks(request.method)
+        if valid:
+            with Tracing.span(request, self, valid.__name__):
+                isValid = self._synchronous(valid.__name__, valid(ui, request))
+            if isValid:
+                with Tracing.span(request, self, process.__name__):
+                    self._synchronous(process.__name__, process(ui, request))
+
+        with Tracing.span(request, self, "setUIData"):
+            self._synchronous('setUIData', self.setUIData(ui, request))
+        return self._renderUI(ui, request, cacheKey)
+
+    def renderResponseAsync(self, request):
+        """
+            Returns an awaitable that renders the response - awaiting any of the UI hooks
+            (buildUI, initUI, populateUI, valid*, process*, setUIData) that are coroutines
+        """
+        from . import Async
+        if type(self).renderResponse is not PageControl.renderResponse:
+            return Async.resolve(self.renderResponse(request))
+
+        return Async.renderControl(self, request)
 
+    def methodHooks(self, method):
+        """
+            Returns the (validation, processing) hooks to call for the given request method or (None, None)
+        """
+        hooks = self.METHOD_HOOKS.get(method, None)
+        if not hooks:
+            return (None, None)
+
+        return (getattr(self, hooks[0]), getattr(self, hooks[1]))
+
+    def _setRequestID(self, request):
         requestID = request.fields.get('requestID')
         if requestID:
             self.id = requestID
         else:
             self.id = self.accessor
 
-        ui = self.buildUI(request)
-        self.initUI(ui, request)
-        self._modifyUI(ui, request)
-        if request.method != "GET":
-            self.populateUI(ui, request)
-        if self.autoReload:
-            ui.clientSide(self.clientSide.get(silent=self.silentReload, timeout=self.autoReload))
-
-        if request.method == "GET" and self.validGet(ui, request):
-            self.processGet(ui, request)
-        elif request.method == "POST" and self.validPost(ui, request):
-            self.processPost(ui, request)
-        elif request.method == "DELETE" and self.validDelete(ui, request):
-            self.processDelete(ui, request)
-        elif request.method == "PUT" and self.validPut(ui, request):
-            self.processPut(ui, request)
-
-        self.setUIData(ui, request)
+    def _renderUI(self, ui, request, cacheKey=None):
         if not self.canEdit(request):
             ui.setEditable(False)
         if not request.response.scripts:
             request.response.scripts = ScriptContainer()
             ui.setScriptContainer(request.response.scripts)
-            return ui.toHTML(request=request) + request.response.scripts.toHTML(request=request)
+            with Tracing.span(request, self, "toHTML"):
+                html = self._uiHTML(ui, request) + request.response.scripts.toHTML(request=request)
+            if cacheKey is not None:
+                self.fragmentCache().set(cacheKey, html)
+            return html
         else:
             ui.setScriptContainer(request.response.scripts)
-            return ui.toHTML(request=request)
+            with Tracing.span(request, self, "toHTML"):
+                return self._uiHTML(ui, request)
+
+    def _uiHTML(self, ui, request):
+        return ui.toHTML(request=request)
+
+    @classmethod
+    def fragmentCache(cls):
+        """
+            Returns the cache rendered responses of this control class are stored in (created on first use)
+        """
+        cache = cls.__dict__.get('_fragmentCache', None)
+        if cache is None:
+            cache = cls._fragmentCache = LRUCache(cls.cacheSize, cls.cacheTimeout)
+        return cache
+
+    @classmethod
+    def encodingCache(cls):
+        """
+            Returns the cache the compressed encodings of this control class's cached responses are stored in -
+            kept apart from the fragment cache so compressed copies never evict rendered responses
+        """
+        cache = cls.__dict__.get('_encodingCache', None)
+        if cache is None:
+            cache = cls._encodingCache = LRUCache(cls.cacheSize, cls.cacheTimeout)
+        return cache
+
+    def cacheKey(self, request):
+        """
+            Returns the key the rendered response is cached under or None if the response should not be cached.
+            Only GET requests rendered on their own (where the control's scripts are part of the response) are cached.
+        """
+        if self.cacheTimeout is None or request.method != "GET" or request.response.scripts:
+            return None
+
+        varyBy = self.grabFields if self.cacheVaryBy is None else self.cacheVaryBy
+        values = []
+        for field in sorted(varyBy):
+            value = request.fields.get(field)
+            values.append((field, tuple(value) if type(value) in (list, set, tuple) else value))
+
+        return (self.accessor, self.id, self.canEdit(request), self.cacheVaryByUser and request.user or None,
+                tuple(values))
 
     def _modifyUI(self, ui, request):
         pass
@@ -245,7 +400,7 @@ class ElementControl(PageControl):
             Populates the UI with data from the request before processing begins, by default only done
             on none GET methods
         """
-        ui.insertVariables(copy.deepcopy(request.fields))
+        ui.insertVariables(HTTP.FieldView(request.fields))
 
     def setUIData(self, ui, request):
         """
@@ -317,6 +472,9 @@ class TemplateControl(ElementControl):
         NOTE: When subclassing set the template attribute - aka template = UITemplate.fromFile("myFile.wui")
     """
     template = UITemplate.Template("empty")
+    cachePrototype = True # if False the template is rebuilt through the element factory on every request
+    dynamicElements = None # ids of the template elements GET requests change - enables static segment rendering
+    verifySegments = False # if True every segmented render is compared against a full render (for debugging)
 
     def __init__(self, id=None, name=None, parent=None, parentHandler=None, initScripts=None, **kwargs):
         ElementControl.__init__(self, id, name, parent, parentHandler, initScripts, **kwargs)
@@ -326,7 +484,7 @@ class TemplateControl(ElementControl):
         """
             After all connections are made we automatically cache replacement actions where possible.
         """
-        templateDefinition = TemplateElement(template=self.template, factory=self.elementFactory)
+        templateDefinition = self.prototype()
         for control in templateDefinition.allChildren():
             if isinstance(control, PageControl):
                 self.registerControl(control.__class__)
@@ -347,11 +505,90 @@ class TemplateControl(ElementControl):
 
         return control
 
+    def prototype(self):
+        """
+            Returns the element tree built from this control's template and element factory - built only once
+            per template / factory pair and never rendered directly
+        """
+        key = (id(self.template), id(self.elementFactory))
+        prototype = templatePrototypes.get(key, None)
+        if prototype is None:
+            prototype = (self.template, self.elementFactory,
+                         TemplateElement(template=self.template, factory=self.elementFactory))
+            templatePrototypes[key] = prototype
+
+        return prototype[2]
+
     def buildUI(self, request):
         """
             Builds an instance of the defined template
         """
-        return TemplateElement(template=self.template, factory=self.elementFactory)
+        if not self.cachePrototype:
+            return TemplateElement(template=self.template, factory=self.elementFactory)
+
+        return copy.deepcopy(self.prototype(), {id(self.template): self.template,
+                                                id(self.elementFactory): self.elementFactory})
+
+    def segments(self):
+        """
+            Returns the template compiled into (staticHTML, slots): the html of every element that is not dynamic
+            and the (elementId, autoRegisterIndex) slots rendered between them - or None if this control can not be
+            rendered in segments. Dynamic elements are the ones listed in dynamicElements (autoRegisterIndex None)
+            and all auto registered control placements - whose controls are looked up in the rendering instance's
+            autoRegister. Compiled once per control class / element factory pair.
+        """
+        key = (self.__class__, id(self.elementFactory))
+        compiled = templateSegments.get(key, None)
+        if compiled is not None:
+            return compiled[1]
+
+        segments = None
+        if self.dynamicElements is not None and self.cachePrototype:
+            ui = self.buildUI(HTTP.Request())
+            slots = [(elementId, None) for elementId in self.dynamicElements]
+            slots.extend((elementId, index) for index, (elementId, control) in enumerate(self.autoRegister))
+            for index, (elementId, autoRegisterIndex) in enumerate(slots):
+                element = getattr(ui, elementId, None)
+                if element is None or not element.parent:
+                    break
+                element.replaceWith(SegmentMarker(index))
+            else:
+                scripts = ui.setScriptContainer(ScriptContainer())
+                parts = SegmentMarker.SPLIT.split(ui.toHTML())
+                if not scripts.content().strip():
+                    segments = (tuple(parts[::2]), tuple(slots[int(index)] for index in parts[1::2]))
+
+        templateSegments[key] = (self.elementFactory, segments)
+        return segments
+
+    def _uiHTML(self, ui, request):
+        """
+            Renders only the dynamic elements of a GET response - joining them with the precompiled static html
+        """
+        segments = self.dynamicElements is not None and request.method == "GET" and not self.autoReload and \
+                   self.canEdit(request) and self.segments()
+        if not segments:
+            return ui.toHTML(request=request)
+
+        staticHTML, slots = segments
+        html = [staticHTML[0]]
+        for (elementId, autoRegisterIndex), static in zip(slots, staticHTML[1:]):
+            if autoRegisterIndex is None:
+                html.append(getattr(ui, elementId).toHTML(request=request))
+            else:
+                html.append(self.autoRegister[autoRegisterIndex][1].toHTML(request=request))
+            html.append(static)
+        html = "".join(html)
+
+        if self.verifySegments:
+            ui.setScriptContainer(ScriptContainer())
+            fullHTML = ui.toHTML(request=request)
+            ui.setScriptContainer(request.response.scripts)
+            if fullHTML != html:
+                raise ValueError("%s: segmented render does not match the full render - add the elements changed "
+                                 "while handling GET requests to dynamicElements" % self.__class__.__name__)
+
+        return html
 
     def _modifyUI(self, ui, request):
         """
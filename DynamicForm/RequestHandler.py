@@ -20,13 +20,70 @@
     Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 '''
 
+import hashlib
 import traceback
+import threading
 import types
+import time
 import json
 
 from . import HTTP
+from . import Resources
+from . import Tracing
 from WebElements.MultiplePythonSupport import *
 
+try:
+    from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+except ImportError:
+    ThreadPoolExecutor = None
+
+executorLock = threading.Lock()
+
+class HandlerSpec(object):
+    """
+        Defines the precomputed, per class and per position in the handler tree, metadata used to construct a
+        request handler - so instantiating a handler tree is a walk over the specs instead of a rediscovery of them
+    """
+    __slots__ = ('handlerClass', 'baseName', 'accessor', 'grabFields', 'grabForms', 'sharedFields', 'sharedForms',
+                 'registration', 'registry', 'children')
+
+    def __init__(self, handlerClass, parentSpec=None):
+        self.handlerClass = handlerClass
+        self.baseName = handlerClass.__name__[0].lower() + handlerClass.__name__[1:]
+        self.accessor = self.baseName
+        self.grabFields = handlerClass.grabFields
+        self.grabForms = handlerClass.grabForms
+        self.sharedFields = handlerClass.sharedFields
+        self.sharedForms = handlerClass.sharedForms
+        self.children = {}
+        self.registry = None # the (script, version) returned by registryScript for a handler placed here
+
+        if parentSpec:
+            self.accessor = parentSpec.accessor + "-" + self.accessor
+            self.grabFields = frozenset(self.grabFields).union(parentSpec.sharedFields)
+            self.grabForms = frozenset(self.grabForms).union(parentSpec.sharedForms)
+            self.sharedFields = frozenset(self.sharedFields).union(parentSpec.sharedFields)
+            self.sharedForms = frozenset(self.sharedForms).union(parentSpec.sharedForms)
+
+        self.registration = {'grabFields':sorted(self.grabFields), 'grabForms':sorted(self.grabForms)}
+
+    @property
+    def childClasses(self):
+        """
+            Returns the RequestHandler classes nested within the handler class
+        """
+        return self.handlerClass.childClasses()
+
+    def child(self, handlerClass):
+        """
+            Returns the spec of the given handler class when placed under this one - creating it on first use
+        """
+        spec = self.children.get(handlerClass, None)
+        if spec is None:
+            spec = self.children[handlerClass] = HandlerSpec(handlerClass, self)
+        return spec
+
+
 class RequestHandler(object):
     """
         Defines the base request handler that supports responding itself or allowing one of its child classes to
@@ -37,37 +94,45 @@ class RequestHandler(object):
     sharedFields = ()  # fields that are part of this controller & will be passed into all childHandlers
     sharedForms = () # forms that are part of this controller  & will be passed into all childHandlers
     resourceFiles = () # defines the resource files that must be loaded with this control
+    concurrentHandlers = 0 # if set, multi-handler requests render concurrently on a thread pool of this size
+    concurrentTimeout = None # seconds all handlers of a concurrent multi-handler request are given (one deadline)
+    compressResponses = False # if True responses are compressed using the best encoding the client accepts
+    compressionLevel = 6 # the compression level used when compressing responses
+    compressionThreshold = 1024 # the minimum response size (in characters) worth compressing
+    useETags = False # if True (here or on the root) GET responses get an ETag and matching If-None-Match get a 304
+    tracer = None # if set (on the root) a Tracing.Tracer that is given a span per handler and phase of each request
+    serverTiming = False # if True (on the root) responses get a Server-Timing header with the duration of every span
+    metrics = None # if set (on the root) a Metrics.Registry recording the count, latency and size of every response
 
     def __init__(self, parentHandler=None, initScripts=None):
         self.parentHandler = parentHandler
-        self.baseName = self.__class__.__name__[0].lower() + self.__class__.__name__[1:]
-        self.accessor = self.baseName
         self.childHandlers = {}
         self.initScripts = initScripts or []
 
-        grabFields = self.grabFields
-        grabForms = self.grabForms
         if parentHandler:
-            self.accessor = self.parentHandler.accessor + "-" + self.accessor
-            self.grabFields = set(self.grabFields).union(parentHandler.sharedFields)
-            self.grabForms = set(self.grabForms).union(parentHandler.sharedForms)
-            self.sharedFields = set(self.sharedFields).union(parentHandler.sharedFields)
-            self.sharedForms = set(self.sharedFields).union(parentHandler.sharedFields)
-
-        self.initScripts.append("DynamicForm.handlers['%s'] = {};" % self.accessor)
-        self.initScripts.append("DynamicForm.handlers['%s'].grabFields = %s;" %
-                                (self.accessor, json.dumps(list(self.grabFields))))
-        self.initScripts.append("DynamicForm.handlers['%s'].grabForms = %s;" %
-                                (self.accessor, json.dumps(list(self.grabForms))))
+            self._routes = parentHandler._routes
+            self._spec = parentHandler._spec.child(self.__class__)
+            self.grabFields = self._spec.grabFields
+            self.grabForms = self._spec.grabForms
+            self.sharedFields = self._spec.sharedFields
+            self.sharedForms = self._spec.sharedForms
+        else:
+            self._spec = self.compiledSpec()
+        self.baseName = self._spec.baseName
+        self.accessor = self._spec.accessor
+        if not parentHandler:
+            self._routes = {self.accessor:self} # accessor -> handler index shared by every handler in the tree
 
         self.makeConnections()
         self._registerChildren()
 
         if not parentHandler:
+            resourceFiles = list(self.resourceFiles)
             for handler in self.allHandlers():
                 handler.rootHandler = self
                 if handler != self:
-                    self.resourceFiles += handler.resourceFiles
+                    resourceFiles.extend(handler.resourceFiles)
+            self.resourceFiles = Resources.unique(resourceFiles)
 
             for handler in self.childHandlers.values():
                 for name, value in iteritems(self.childHandlers):
@@ -77,15 +142,41 @@ class RequestHandler(object):
     def __str__(self):
         return " ".join([string[0].upper() + string[1:] for string in self.accessor.split("-")])
 
+    @classmethod
+    def compiledSpec(cls):
+        """
+            Returns the HandlerSpec used when this handler is the root of a handler tree (computed once per class)
+        """
+        spec = cls.__dict__.get('_rootSpec', None)
+        if spec is None:
+            spec = HandlerSpec(cls)
+            cls._rootSpec = spec
+        return spec
+
+    @classmethod
+    def childClasses(cls):
+        """
+            Returns the RequestHandler classes nested within this class (discovered once per class)
+        """
+        childClasses = cls.__dict__.get('_childClasses', None)
+        if childClasses is None:
+            childClasses = []
+            for attribute in (getattr(cls, attribute, None) for attribute in dir(cls)
+                              if attribute not in ('__class__', )):
+                if type(attribute) == type and \
+                   issubclass(attribute, RequestHandler) and not attribute.__name__.startswith("Abstract"):
+                    childClasses.append(attribute)
+            childClasses = tuple(childClasses)
+            cls._childClasses = childClasses
+        return childClasses
+
     def _registerChildren(self):
-        for attribute in (getattr(self, attribute, None) for attribute in dir(self) if attribute not in ('__class__',)):
-            if type(attribute) == type and \
-               issubclass(attribute, RequestHandler) and not attribute.__name__.startswith("Abstract"):
-                self.registerControl(attribute)
+        for controlClass in self._spec.childClasses:
+            self.registerControl(controlClass)
 
         # Connect sibling handlers so they can communicate with each-other easily
-        for childHandlerName, childHandler in self.childHandlers.iteritems():
-            for siblingName, siblingHandler in self.childHandlers.iteritems():
+        for childHandlerName, childHandler in iteritems(self.childHandlers):
+            for siblingName, siblingHandler in iteritems(self.childHandlers):
                 if childHandlerName == siblingName:
                     continue
 
@@ -102,6 +193,9 @@ class RequestHandler(object):
         instance = controlClass(parentHandler=self, initScripts=self.initScripts)
         self.childHandlers[instance.baseName] = instance
         self.__setattr__(instance.baseName, instance)
+        if self._routes.get(self.accessor, None) is self: # Only handlers reachable from the root are routable
+            for handler in instance.allHandlers():
+                self._routes[handler.accessor] = handler
         return instance
 
     def up(self, levels=1):
@@ -125,52 +219,202 @@ class RequestHandler(object):
         """
             Handles a django request - returning a django response
         """
-        return self.handleRequest(HTTP.Request.fromDjangoRequest(request)).toDjangoResponse()
+        request = HTTP.Request.fromDjangoRequest(request)
+        return self.compressResponse(request, self.handleRequest(request)).toDjangoResponse()
+
+    @classmethod
+    def wsgiApp(cls):
+        """
+            Creates a WSGI application from the request handler object
+        """
+        return cls().handleWSGIRequest
+
+    def handleWSGIRequest(self, environ, startResponse):
+        """
+            Handles a WSGI request - returning the response body iterable after calling startResponse
+        """
+        request = HTTP.Request.fromWSGIEnviron(environ)
+        return self.compressResponse(request, self.handleRequest(request)).toWSGI(startResponse)
+
+    @classmethod
+    def asgiApp(cls, threads=None):
+        """
+            Creates an ASGI application from the request handler object - synchronous handlers are run on a thread
+            pool of the given size (requires Python 3.7+)
+        """
+        from . import ASGI
+        return ASGI.Application(cls(), threads)
+
+    def compressResponse(self, request, response):
+        """
+            Compresses the response based on the request's Accept-Encoding header (if compressResponses is set)
+        """
+        if self.compressResponses:
+            response.compress(request.acceptedEncodings(), self.compressionLevel, self.compressionThreshold)
+        return response
 
     def handleRequest(self, request, handlers=None):
         """
             handles a single request returning a response object
         """
-        if not handlers:
+        if handlers is None and request.span is None and (self.tracer or self.serverTiming):
+            with Tracing.trace(request, self) as span:
+                response = self.handleRequest(request)
+            if self.serverTiming:
+                response['Server-Timing'] = span.serverTiming()
+            return response
+
+        if handlers is None:
             handlers = request.fields.get('requestHandler', '')
             if type(handlers) in (list, set, tuple):
-                result = [self.handleRequest(request.copy(), handler.split("-")).serialize() for handler in handlers]
+                resolved = [handler for handler in map(self.resolveHandler, handlers) if handler is not None]
+                self.resolvePermissions(request, resolved)
+                if self.concurrentHandlers and ThreadPoolExecutor and len(handlers) > 1:
+                    responses = self._handleConcurrently(request, handlers)
+                else:
+                    responses = [self.handleRequest(request.copy(), handler) for handler in handlers]
+                result = [response.serialize() for response in responses]
                 request.response.status = HTTP.Response.Status.MULTI_STATUS
                 request.response.contentType = HTTP.Response.ContentType.JSON
                 request.response.content = json.dumps(result)
                 return request.response
+        elif type(handlers) == list:
+            handlers = "-".join(handlers)
 
-            handlers = handlers.split("-")
+        handler = self.resolveHandler(handlers)
+        if self.metrics is None and not self.tracer:
+            return self._respondWith(request, handler, handlers)
 
-        if not handlers.pop(0) in (self.baseName, ""): # Ensure the handler is either the current handler or not spec.
-            request.response.status = HTTP.Response.Status.NOT_FOUND
-            request.response.content = self.renderNotFound(request, request.fields.get('requestHandler', ''))
-        elif handlers:
-            handler = self.childHandlers.get(handlers[0], None)
-            if not handler:
-                request.response.status = HTTP.Response.Status.NOT_FOUND
-                request.response.content = self.renderNotFound(request, request.fields.get('requestHandler', ''))
-            return handler.handleRequest(request, handlers)
-        else:
+        start = Tracing.timer() if self.metrics is not None else None
+        return self._measure(request, handler, self._respondWith(request, handler, handlers), start)
+
+    def _measure(self, request, handler, response, start=None):
+        """
+            Records the metrics of a response rendered since start (None if metrics are not recorded) - a streamed
+            response is only rendered as it is iterated, so it is measured and traced once the stream finishes
+        """
+        content = response.content
+        if handler is not None and content is not None and not isinstance(content, HTTP.STRING_TYPES):
+            response.content = self._measuredStream(request, handler, response, content, start)
+        elif start is not None:
+            self.metrics.record(handler and handler.accessor, response.status, Tracing.timer() - start,
+                                len(content) if isinstance(content, HTTP.STRING_TYPES) else None)
+        return response
+
+    def _measuredStream(self, request, handler, response, chunks, start):
+        span = Tracing.span(request, handler, "stream")
+        if self.tracer and span is Tracing.NULL_SPAN: # the trace of the request finished before streaming started
+            span = self.tracer.trace(request, handler, "stream")
+
+        size = 0
+        with span:
             try:
-                if not self.canView(request) or (request.method != "GET" and not self.canEdit(request)):
-                    request.response.status = HTTP.Response.Status.UNAUTHORIZED
-                    request.response.content = self.renderUnauthorized(request)
-                request.response.content = self.renderResponse(request)
-            except Exception as e:
-                request.response.status = HTTP.Response.Status.INTERNAL_SERVER_ERROR
-                request.response.content = self.renderInternalError(request, e)
+                for chunk in chunks:
+                    size += len(chunk)
+                    yield chunk
+            finally:
+                if start is not None:
+                    self.metrics.record(handler.accessor, response.status, Tracing.timer() - start, size)
+
+    def _respondWith(self, request, handler, accessor):
+        """
+            Renders the response of the resolved handler (or the not found response if it is None)
+        """
+        if handler is None:
+            request.response.status = HTTP.Response.Status.NOT_FOUND
+            request.response.content = self.renderNotFound(request, accessor)
+            return request.response
+
+        try:
+            if not handler._synchronous('canView', handler.canView(request)) or \
+               (request.method != "GET" and not handler._synchronous('canEdit', handler.canEdit(request))):
+                request.response.status = HTTP.Response.Status.UNAUTHORIZED
+                request.response.content = handler.renderUnauthorized(request)
+                return request.response
+
+            conditional = (handler.useETags or self.useETags) and request.method == "GET"
+            etag = conditional and handler.versionETag(request)
+            if etag and handler._notModified(request, etag):
+                return request.response
+
+            with Tracing.span(request, handler, "renderResponse"):
+                request.response.content = handler.renderResponse(request)
+            if conditional and isinstance(request.response.content, HTTP.STRING_TYPES):
+                handler._notModified(request, etag or handler.etag(request, request.response.content))
+        except Exception as e:
+            request.response.status = HTTP.Response.Status.INTERNAL_SERVER_ERROR
+            request.response.content = handler.renderInternalError(request, e)
 
         return request.response
 
+    def handleRequestAsync(self, request, handlers=None):
+        """
+            Returns an awaitable that handles a single request returning a response object - awaiting any
+            renderResponse implementation or page control hook that is a coroutine (requires Python 3.7+)
+        """
+        from . import Async
+        return Async.handleRequest(self, request, handlers)
+
+    def _handleConcurrently(self, request, handlers):
+        """
+            Handles each of the requested handlers on the thread pool - returning the responses in the requested order.
+            concurrentTimeout is a single deadline for the whole batch: handlers that have not finished by then get a
+            timeout response. Handlers that are already running can not be cancelled - they keep their pool worker
+            until they finish (so size concurrentHandlers with that in mind)
+        """
+        executor = self.executor()
+        requests = [request.copy() for handler in handlers]
+        futures = [executor.submit(self.handleRequest, subRequest, handler)
+                   for subRequest, handler in zip(requests, handlers)]
+
+        deadline = None
+        if self.concurrentTimeout is not None:
+            deadline = time.time() + self.concurrentTimeout
+
+        responses = []
+        for subRequest, handler, future in zip(requests, handlers, futures):
+            try:
+                timeout = None if deadline is None else max(deadline - time.time(), 0)
+                responses.append(future.result(timeout))
+            except FutureTimeoutError:
+                future.cancel()
+                responses.append(HTTP.Response(self.renderTimeout(subRequest, handler),
+                                               status=HTTP.Response.Status.GATEWAY_TIMEOUT))
+        return responses
+
+    def executor(self):
+        """
+            Returns the thread pool used to render multi-handler requests concurrently (created on first use)
+        """
+        executor = getattr(self, '_executor', None)
+        if executor is None:
+            with executorLock:
+                executor = getattr(self, '_executor', None)
+                if executor is None:
+                    executor = self._executor = ThreadPoolExecutor(self.concurrentHandlers)
+        return executor
+
+    def resolveHandler(self, accessor):
+        """
+            Returns the handler (this one or a descendant) the given accessor refers to, or None if there is no match
+            NOTE: The accessor is relative to this handler - so it must start with its baseName or be left blank
+        """
+        baseName, separator, path = accessor.partition("-")
+        if not baseName in (self.baseName, ""): # Ensure the handler is either the current handler or not specified
+            return None
+        if not path:
+            return self
+
+        return self._routes.get(self.accessor + "-" + path, None)
+
     def canView(self, request):
         """
-            Returns true if the request's user is allowed to view this content
+            Returns true if the request's user is allowed to view this content - checked once per request
         """
         if self.parentHandler:
-            return self.parentHandler.canView(request)
+            return self._remember(request, 'canView', lambda: self.parentHandler.canView(request))
         else:
-            return self._canView(request)
+            return self._remember(request, 'canView', lambda: self._canView(request))
 
     def _canView(self, request):
         """
@@ -181,14 +425,14 @@ class RequestHandler(object):
 
     def canEdit(self, request):
         """
-            Returns true if the request's user is allowed to edit this content
+            Returns true if the request's user is allowed to edit this content - checked once per request
         """
         if self.parentHandler:
-            return self.parentHandler.canEdit(request)
+            return self._remember(request, 'canEdit', lambda: self.parentHandler.canEdit(request))
         if not self.canView(request):
             return False
 
-        return self._canEdit(request)
+        return self._remember(request, 'canEdit', lambda: self._canEdit(request))
 
     def _canEdit(self, request):
         """
@@ -196,6 +440,40 @@ class RequestHandler(object):
         """
         return True
 
+    def _remember(self, request, permission, check):
+        """
+            Returns the result of check() - remembered in request.permissions (shared by the request's copies) under
+            (permission, accessor) so the handler chain is only walked once per request
+        """
+        key = (permission, self.accessor)
+        if key in request.permissions:
+            return request.permissions[key]
+
+        allowed = check()
+        if not hasattr(allowed, '__await__'): # a coroutine can only be awaited once
+            request.permissions[key] = allowed
+        return allowed
+
+    def _synchronous(self, hook, result):
+        """
+            Returns the result of calling the given hook while handling a request synchronously - raising a TypeError
+            if the hook is a coroutine (requests to those must be handled with handleRequestAsync)
+        """
+        if hasattr(result, '__await__'):
+            if hasattr(result, 'close'):
+                result.close()
+            raise TypeError("%s.%s returned an awaitable - handle the request with handleRequestAsync" %
+                            (self.__class__.__name__, hook))
+        return result
+
+    def resolvePermissions(self, request, handlers):
+        """
+            Called on the root handler with every handler of a multi-handler request before any of them is rendered.
+            Override to resolve their permissions at once (for instance in a single query) by filling in
+            request.permissions[('canView', handler.accessor)] and request.permissions[('canEdit', handler.accessor)]
+        """
+        pass
+
     def allHandlers(self, handlerList=None):
         """
             Returns itself and all child handlers
@@ -208,6 +486,20 @@ class RequestHandler(object):
             child.allHandlers(handlerList)
         return handlerList
 
+    def registryScript(self):
+        """
+            Returns (script, version) where script registers the grabbed fields and forms of every handler in this
+            handler's tree client side and version is a hash of it - computed once per handler class and position in
+            the handler tree
+        """
+        registry = self._spec.registry
+        if registry is None:
+            handlers = dict((handler.accessor, handler._spec.registration) for handler in self.allHandlers())
+            script = "DynamicForm.registerHandlers(%s);" % json.dumps(handlers, sort_keys=True, separators=(',', ':'))
+            registry = self._spec.registry = (script, hashlib.sha1(script.encode('utf8')).hexdigest()[:16])
+
+        return registry
+
     def makeConnections(self):
         """
             A safe post instantiation place to make connections between child handlers
@@ -220,6 +512,54 @@ class RequestHandler(object):
         """
         return ""
 
+    def contentVersion(self, request):
+        """
+            Override to return an identifier that changes whenever the rendered content would (when useETags is set)
+            - enabling a 304 response to be given without rendering at all
+        """
+        return None
+
+    def etag(self, request, content):
+        """
+            Returns the strong entity tag for the given content (or content version) of this handler
+        """
+        if not isinstance(content, bytes):
+            content = content.encode('utf8')
+        tag = hashlib.sha1((self.accessor + ":" + request.fields.get('requestID', '') + ":").encode('utf8'))
+        tag.update(content)
+        return '"%s"' % tag.hexdigest()
+
+    def versionETag(self, request):
+        """
+            Returns the entity tag derived from contentVersion or None if this handler does not provide one
+        """
+        version = self.contentVersion(request)
+        if version is None:
+            return None
+        return self.etag(request, str(version))
+
+    def _notModified(self, request, etag):
+        """
+            Tags the response with the given etag - turning it into a body-less 304 if the client already has it
+        """
+        if request.response.status != HTTP.Response.Status.OK:
+            return False
+
+        request.response['ETag'] = etag
+        clientTags = request.ifNoneMatch()
+        if etag in clientTags or "*" in clientTags:
+            request.response.status = HTTP.Response.Status.NOT_MODIFIED
+            request.response.content = ""
+            return True
+        return False
+
+    def renderResponseAsync(self, request):
+        """
+            Returns an awaitable version of renderResponse (used by handleRequestAsync)
+        """
+        from . import Async
+        return Async.resolve(self.renderResponse(request))
+
     def renderNotFound(self, request, resource):
         """
             Defines the response given when a handler is not found (should be overridden by concrete handlers)
@@ -232,6 +572,12 @@ class RequestHandler(object):
         """
         return "Internal Server Error: %s\n%s" % (str(exception), str(traceback.format_exc()))
 
+    def renderTimeout(self, request, resource):
+        """
+            Defines the response when a concurrently rendered handler does not finish within concurrentTimeout
+        """
+        return "Timeout: %s did not respond in time." % resource
+
     def renderUnauthorized(self, request):
         """
             Defines the response when the user is not authorized to view a section
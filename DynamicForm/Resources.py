@@ -0,0 +1,117 @@
+'''
+    Resources.py
+
+    Defines how the resource files (javascript and stylesheets) of a page are combined into fingerprinted bundles
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import os
+import re
+import hashlib
+import posixpath
+from collections import namedtuple
+
+Bundle = namedtuple('Bundle', ('name', 'fileType', 'content', 'files'))
+
+BUNDLED_TYPES = ('js', 'css')
+SEPARATORS = {'js':";\n", 'css':"\n"}
+CSS_COMMENTS = re.compile(r"/\*.*?\*/", re.DOTALL)
+CSS_URLS = re.compile(r"""(url\(\s*(['"]?)|@import\s+(['"]))([^'"()\s]+)""")
+ABSOLUTE_URL = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*:|/|#)")
+
+
+def unique(resourceFiles):
+    """
+        Returns the resource files in the order they were first listed with any duplicates removed
+    """
+    seen = set()
+    return tuple(resourceFile for resourceFile in resourceFiles
+                 if not (resourceFile in seen or seen.add(resourceFile)))
+
+
+def minify(content, fileType):
+    """
+        Conservatively minifies css - stripping comments, indentation, trailing whitespace and blank lines but never
+        rewriting the rules themselves. Javascript is returned unchanged: even whitespace can be part of its content
+        (inside template literals and backslash continued strings)
+    """
+    if fileType != "css":
+        return content
+
+    content = CSS_COMMENTS.sub("", content)
+    return "\n".join(line.strip() for line in content.splitlines() if line.strip())
+
+
+def rebaseURLs(content, resourceFile):
+    """
+        Rewrites the relative urls (url(...) and @import) of a stylesheet so they resolve the same from the page the
+        bundle is served from as they did from the stylesheet's own location
+    """
+    directory = posixpath.dirname(resourceFile)
+    if not directory:
+        return content
+
+    def rebase(match):
+        url = match.group(4)
+        if ABSOLUTE_URL.match(url):
+            return match.group(0)
+        return match.group(1) + posixpath.normpath(posixpath.join(directory, url))
+
+    return CSS_URLS.sub(rebase, content)
+
+
+def bundle(resourceFiles, root, minified=True):
+    """
+        Combines the resource files that can be found under root into bundles - named after a hash of their content
+        (with the relative urls of stylesheets rewritten to resolve from the page the bundle is served from).
+        Returns (bundles, resources) where resources are the resource files in their original order with each run
+        of files of one type that can be bundled replaced by its bundle. A file that can not be bundled (remote
+        files, missing files, and file types other than js and css) ends the runs before it - so it still loads
+        after the files listed before it and before the files listed after it
+    """
+    resources = []
+    runs = {}
+    for resourceFile in unique(resourceFiles):
+        fileType = resourceFile.rsplit(".", 1)[-1].lower()
+        path = os.path.join(root, resourceFile.lstrip("/"))
+        if fileType not in BUNDLED_TYPES or "//" in resourceFile or not os.path.isfile(path):
+            resources.append(resourceFile)
+            runs.clear()
+            continue
+
+        with open(path, 'rb') as openFile:
+            content = openFile.read().decode('utf8')
+        if fileType == "css":
+            content = rebaseURLs(content, resourceFile)
+        run = runs.get(fileType, None)
+        if run is None:
+            run = runs[fileType] = []
+            resources.append(run)
+        run.append((resourceFile, minified and minify(content, fileType) or content))
+
+    bundles = []
+    for index, run in enumerate(resources):
+        if type(run) == list:
+            files, parts = zip(*run)
+            fileType = files[0].rsplit(".", 1)[-1].lower()
+            content = SEPARATORS[fileType].join(parts)
+            name = "bundle.%s.%s" % (hashlib.sha1(content.encode('utf8')).hexdigest()[:16], fileType)
+            resources[index] = Bundle(name, fileType, content, files)
+            bundles.append(resources[index])
+
+    return tuple(bundles), tuple(resources)
@@ -0,0 +1,131 @@
+'''
+    Tracing.py
+
+    Defines the spans used to trace how long each handler (and each phase of rendering a page control) takes
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import time
+from operator import attrgetter
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+class Tracer(object):
+    """
+        Starts the trace of each request and passes every span to its sink (any callable taking the span) as it
+        finishes - the span of the whole request finishes last and is the only one without a parent
+    """
+    def __init__(self, sink=None):
+        self.sink = sink
+
+    def trace(self, request, handler, phase="request"):
+        """
+            Returns the span that traces handling the whole request (to be used as a context manager)
+        """
+        return Span(request, None, handler.accessor, phase, self)
+
+    def finish(self, span):
+        if self.sink is not None:
+            self.sink(span)
+
+
+class Span(object):
+    """
+        Defines the time spent by a handler in one phase of handling a request - while it is entered it is the
+        request's current span, so the spans started during it become its children
+    """
+    __slots__ = ('request', 'parent', 'tracer', 'accessor', 'phase', 'children', 'start', 'duration')
+
+    def __init__(self, request, parent, accessor, phase, tracer=None):
+        self.request = request
+        self.parent = parent
+        self.tracer = tracer or parent.tracer
+        self.accessor = accessor
+        self.phase = phase
+        self.children = []
+        self.start = None
+        self.duration = None
+
+    def __enter__(self):
+        self.start = timer()
+        self.request.span = self
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        self.duration = timer() - self.start
+        self.request.span = self.parent
+        self.request = None
+        if self.parent is not None:
+            self.parent.children.append(self)
+        self.tracer.finish(self)
+        return False
+
+    def __repr__(self):
+        return "<Span %s.%s %s>" % (self.accessor, self.phase, self.duration)
+
+    def walk(self):
+        """
+            Yields this span followed by all of its descendants - depth first, in the order they started
+        """
+        yield self
+        for child in sorted(self.children, key=attrgetter('start')):
+            for span in child.walk():
+                yield span
+
+    def serverTiming(self):
+        """
+            Returns this span and its descendants formatted as the value of a Server-Timing header
+        """
+        return ", ".join("%s.%s;dur=%.3f" % (span.accessor, span.phase, span.duration * 1000)
+                         for span in self.walk() if span.duration is not None)
+
+
+class NullSpan(object):
+    """
+        Defines the span used when a request is not traced - entering and exiting it does nothing
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        return False
+
+
+NULL_SPAN = NullSpan()
+DEFAULT_TRACER = Tracer() # records spans only for the Server-Timing header of handlers without their own tracer
+
+
+def span(request, handler, phase):
+    """
+        Returns a span (to be used as a context manager) timing the given phase of the handler as part of the
+        request's trace - or the no-op NULL_SPAN if the request is not being traced
+    """
+    parent = request.span
+    if parent is None:
+        return NULL_SPAN
+    return Span(request, parent, handler.accessor, phase)
+
+
+def trace(request, handler):
+    """
+        Returns the span tracing the whole request using the handler's tracer
+    """
+    return (handler.tracer or DEFAULT_TRACER).trace(request, handler)
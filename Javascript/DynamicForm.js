@@ -40,7 +40,7 @@ RestClient.getXMLHttp = function()
 }
 
 //Makes a raw AJAX call, passing in the response to a callback function - Returns true if the request is made
-RestClient.makeRequest = function(url, method, params, callbackFunction)
+RestClient.makeRequest = function(url, method, params, callbackFunction, headers)
 {
     var xmlhttp = RestClient.getXMLHttp();
     if(!xmlhttp) return false;
@@ -63,6 +63,10 @@ RestClient.makeRequest = function(url, method, params, callbackFunction)
             xmlhttp.setRequestHeader('X-CSRFToken', csrfToken);
         }
     }
+    for(var header in headers || {})
+    {
+        xmlhttp.setRequestHeader(header, headers[header]);
+    }
 
     xmlhttp.onreadystatechange =
             function ()
@@ -103,10 +107,20 @@ RestClient.DELETE = function(url, params, callbackFunction)
 
 var DynamicForm = DynamicForm || {};
 DynamicForm.RestClient = RestClient;
-DynamicForm.handlers = {};
+DynamicForm.handlers = DynamicForm.handlers || {};
 DynamicForm.loading = {};
+DynamicForm.etags = {};
 DynamicForm.baseURL = '';
 
+// Registers the fields and forms each handler grabs - {accessor: {grabFields: [...], grabForms: [...]}}
+DynamicForm.registerHandlers = function(handlers)
+{
+    for(var accessor in handlers)
+    {
+        DynamicForm.handlers[accessor] = handlers[accessor];
+    }
+}
+
 // Returns a serialized string representation of a single control
 DynamicForm.serializeControl = function(pageControl)
 {
@@ -144,6 +158,16 @@ DynamicForm.serializeControls = function(pageControls, fresh)
     return serializedHandlers.concat([WebElements.serializeElements(WebElements.sortUnique(fields))]).join("&");
 }
 
+// Hides the loading placeholder of a control (if it has one)
+DynamicForm.hideLoading = function(pageControl)
+{
+    var loader = WebElements.get(pageControl.id + ':Loading');
+    if(loader)
+    {
+        WebElements.hide(loader);
+    }
+}
+
 // Stops the loading of a control
 DynamicForm.abortLoading = function(view)
 {
@@ -189,6 +213,10 @@ DynamicForm._requestPageControls = function(pageControls, method, silent, params
         {
             var pageControl = pageControls[currentPageControl];
             var loader = WebElements.get(pageControl.id + ":Loading");
+            if(!loader) // Controls with showLoading disabled keep their current content while loading
+            {
+                continue;
+            }
             var contentHeight = pageControl.offsetHeight;
 
             WebElements.hide(pageControl);
@@ -203,8 +231,26 @@ DynamicForm._requestPageControls = function(pageControls, method, silent, params
         }
     }
 
+    var headers = {};
+    if(method == "GET")
+    {
+        var etags = [];
+        for(currentPageControl = 0; currentPageControl < pageControls.length; currentPageControl++)
+        {
+            if(DynamicForm.etags[pageControls[currentPageControl].id])
+            {
+                etags.push(DynamicForm.etags[pageControls[currentPageControl].id]);
+            }
+        }
+        if(etags.length)
+        {
+            headers['If-None-Match'] = etags.join(", ");
+        }
+    }
+
     DynamicForm.loading[pageControlName] = RestClient.makeRequest(DynamicForm.baseURL, method, params,
-                                                function(response){DynamicForm._applyUpdates(response, pageControls)});
+                                                function(response){DynamicForm._applyUpdates(response, pageControls)},
+                                                headers);
 }
 
 // Applies the servers updated HTML
@@ -247,10 +293,27 @@ DynamicForm._applyUpdates = function(xmlhttp, pageControls)
         var response = responses[currentPageControl];
 
         DynamicForm.loading[pageControl.id] = null;
+        if(response.status == 304) // The server confirmed the current content is up to date
+        {
+            WebElements.show(pageControl);
+            DynamicForm.hideLoading(pageControl);
+            continue;
+        }
+
+        var etag = response.etag || (response.getResponseHeader && response.getResponseHeader('ETag'));
+        if(etag)
+        {
+            DynamicForm.etags[pageControl.id] = etag;
+        }
+        else
+        {
+            delete DynamicForm.etags[pageControl.id];
+        }
+
         pageControl.innerHTML = response.responseText;
         WebElements.show(pageControl);
 
-        WebElements.hide(pageControl.id + ':Loading');
+        DynamicForm.hideLoading(pageControl);
 
         WebElements.forEach(pageControl.getElementsByTagName('script'), function(scr){
                 if(scr.innerHTML)
@@ -0,0 +1,76 @@
+'''
+    test_ASGI.py
+
+    Tests serving a request handler tree as an ASGI application
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import asyncio
+import threading
+
+from DynamicForm.RequestHandler import RequestHandler
+
+
+class Frame(RequestHandler):
+
+    def renderResponse(self, request):
+        request.response.setCookie("cookie", "value")
+        return "%s:%s" % (request.fields.get('field'), threading.current_thread() is threading.main_thread())
+
+    class Content(RequestHandler):
+
+        async def renderResponse(self, request):
+            return "content:%s" % (threading.current_thread() is threading.main_thread(), )
+
+
+def call(application, queryString=b'', body=b'', method="GET"):
+    messages = [{'type':'http.request', 'body':body[:2], 'more_body':True}, {'type':'http.request', 'body':body[2:]}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type':'http', 'method':method, 'path':'/', 'query_string':queryString,
+             'headers':[(b'content-type', b'application/x-www-form-urlencoded')]}
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class TestApplication(object):
+    """
+        Tests the ASGI Application object
+    """
+    application = Frame.asgiApp(2)
+
+    def test_syncHandler(self):
+        start, body = call(self.application, b'requestHandler=frame', b'field=value', "POST")
+        assert start['status'] == 200
+        assert (b'set-cookie', b'cookie=value;Path=/') in start['headers']
+        assert body['body'] == b"value:False" # Ran on the thread pool
+
+    def test_asyncHandler(self):
+        start, body = call(self.application, b'requestHandler=frame-content')
+        assert start['status'] == 200
+        assert body['body'] == b"content:True" # Awaited on the event loop
+
+    def test_notFound(self):
+        start, body = call(self.application, b'requestHandler=frame-missing')
+        assert start['status'] == 404
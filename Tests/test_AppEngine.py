@@ -0,0 +1,98 @@
+'''
+    test_AppEngine.py
+
+    Tests that the AppEngine version of DynamicForm responds to requests passed in by webapp2
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import sys
+import types
+
+from DynamicForm import HTTP
+
+try:
+    import webapp2
+except ImportError: # Outside of AppEngine stand in for the parts of webapp2 the adapter relies on
+    webapp2 = types.ModuleType('webapp2')
+
+    class WebApp2RequestHandler(object):
+        def __init__(self, request=None, response=None):
+            self.request = request
+            self.response = response
+    webapp2.RequestHandler = WebApp2RequestHandler
+    sys.modules['webapp2'] = webapp2
+
+from DynamicForm import AppEngine
+
+
+class AppEngineRequest(object):
+    def __init__(self, fields):
+        self.fields = fields
+        self.body = ""
+        self.cookies = {}
+        self.environ = {}
+        self.path = "/"
+
+    def arguments(self):
+        return list(self.fields)
+
+    def get_all(self, name):
+        return [self.fields[name]]
+
+
+class AppEngineResponse(object):
+    def __init__(self):
+        self.out = self
+        self.headers = self
+        self.content = []
+        self.headerList = []
+        self.status = None
+
+    def write(self, content):
+        self.content.append(content)
+
+    def set_status(self, status):
+        self.status = status
+
+    def add(self, header, value):
+        self.headerList.append((header, value))
+
+
+class AppEngineUsers(object):
+    @staticmethod
+    def get_current_user():
+        return None
+
+
+class AppEnginePage(AppEngine.DynamicForm):
+    pass
+
+
+class TestAppEngine(object):
+    """
+        Tests that the webapp2 handler methods route requests through the DynamicForm handler tree
+    """
+    def test_get(self, monkeypatch):
+        monkeypatch.setattr(HTTP, 'appEngineUsers', AppEngineUsers)
+        response = AppEngineResponse()
+        page = AppEnginePage(AppEngineRequest({'requestHandler':'appEnginePage-handlerRegistry'}), response)
+        page.get()
+
+        assert response.status == HTTP.Response.Status.OK
+        assert "".join(response.content).startswith("DynamicForm.registerHandlers(")
+        assert ('Content-Type', HTTP.Response.ContentType.JAVASCRIPT + ";charset=UTF-8") in response.headerList
@@ -0,0 +1,118 @@
+'''
+    test_Async.py
+
+    Tests the asyncio based request handling path
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import asyncio
+import json
+
+from DynamicForm import HTTP
+from DynamicForm import PageControls
+from DynamicForm.RequestHandler import RequestHandler
+
+
+class Frame(RequestHandler):
+
+    def renderResponse(self, request):
+        return "frame"
+
+    class Content(RequestHandler):
+
+        async def renderResponse(self, request):
+            await asyncio.sleep(0)
+            return "content"
+
+    class AsyncControl(PageControls.ElementControl):
+
+        async def buildUI(self, request):
+            await asyncio.sleep(0)
+            return self.buildElement("label", properties={'text':'Label'})
+
+        async def processGet(self, ui, request):
+            await asyncio.sleep(0)
+            ui.setText("Processed")
+
+
+class GuardedFrame(RequestHandler):
+
+    async def _canView(self, request):
+        await asyncio.sleep(0)
+        return request.user != "anonymous"
+
+    async def _canEdit(self, request):
+        await asyncio.sleep(0)
+        return request.user == "editor"
+
+    def renderResponse(self, request):
+        return "frame"
+
+    class Content(RequestHandler):
+
+        def renderResponse(self, request):
+            return self.canEdit(request) and "editable" or "readOnly"
+
+
+class TestAsync(object):
+    """
+        Tests handling requests through handleRequestAsync
+    """
+    testFrame = Frame()
+
+    def test_handleRequestAsync(self):
+        response = asyncio.run(self.testFrame.handleRequestAsync(HTTP.Request({'requestHandler':'frame'})))
+        assert response.content == "frame"
+        assert response.status == HTTP.Response.Status.OK
+
+        response = asyncio.run(self.testFrame.handleRequestAsync(HTTP.Request({'requestHandler':'frame-content'})))
+        assert response.content == "content"
+
+        response = asyncio.run(self.testFrame.handleRequestAsync(HTTP.Request({'requestHandler':'frame-missing'})))
+        assert response.status == HTTP.Response.Status.NOT_FOUND
+
+    def test_multiStatus(self):
+        request = HTTP.Request({'requestHandler':['frame-content', 'frame']})
+        response = asyncio.run(self.testFrame.handleRequestAsync(request))
+        assert response.status == HTTP.Response.Status.MULTI_STATUS
+        assert [result['responseText'] for result in json.loads(response.content)] == ["content", "frame"]
+
+    def test_asyncHooks(self):
+        request = HTTP.Request({'requestHandler':'frame-asyncControl'}, method="GET")
+        response = asyncio.run(self.testFrame.handleRequestAsync(request))
+        assert response.status == HTTP.Response.Status.OK
+        assert "Processed" in response.content
+
+    def test_asyncPermissions(self):
+        guardedFrame = GuardedFrame()
+        for user, method, status, content in (("anonymous", "GET", HTTP.Response.Status.UNAUTHORIZED, None),
+                                              ("user", "GET", HTTP.Response.Status.OK, "readOnly"),
+                                              ("user", "POST", HTTP.Response.Status.UNAUTHORIZED, None),
+                                              ("editor", "POST", HTTP.Response.Status.OK, "editable")):
+            request = HTTP.Request({'requestHandler':'guardedFrame-content'}, method=method, user=user)
+            response = asyncio.run(guardedFrame.handleRequestAsync(request))
+            assert response.status == status
+            if content:
+                assert response.content == content
+
+        response = guardedFrame.handleRequest(HTTP.Request({'requestHandler':'guardedFrame-content'}, user="user"))
+        assert response.status == HTTP.Response.Status.INTERNAL_SERVER_ERROR
+
+    def test_syncRenderOfAsyncHooks(self):
+        response = self.testFrame.handleRequest(HTTP.Request({'requestHandler':'frame-asyncControl'}, method="GET"))
+        assert response.status == HTTP.Response.Status.INTERNAL_SERVER_ERROR
@@ -0,0 +1,70 @@
+'''
+    test_Cache.py
+
+    Tests the in memory caches used to store rendered responses
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import time
+
+from DynamicForm.Cache import LRUCache
+
+
+class TestLRUCache(object):
+    """
+        Tests all public methods of the LRUCache object
+    """
+    def test_get(self):
+        cache = LRUCache()
+        assert cache.get('key') == None
+        assert cache.get('key', 'default') == 'default'
+        assert cache.set('key', 'value') == 'value'
+        assert cache.get('key') == 'value'
+        assert 'key' in cache
+        assert len(cache) == 1
+
+    def test_eviction(self):
+        cache = LRUCache(size=2)
+        cache.set('first', 1)
+        cache.set('second', 2)
+        cache.get('first')
+        cache.set('third', 3)
+        assert len(cache) == 2
+        assert 'second' not in cache
+        assert cache.get('first') == 1
+        assert cache.get('third') == 3
+
+    def test_timeout(self):
+        cache = LRUCache(timeout=0.05)
+        cache.set('key', 'value')
+        cache.set('forever', 'value', timeout=60)
+        assert cache.get('key') == 'value'
+        time.sleep(0.1)
+        assert cache.get('key') == None
+        assert cache.get('forever') == 'value'
+
+    def test_delete(self):
+        cache = LRUCache()
+        cache.set('key', 'value')
+        cache.delete('key')
+        cache.delete('notSet')
+        assert 'key' not in cache
+
+        cache.set('key', 'value')
+        cache.clear()
+        assert len(cache) == 0
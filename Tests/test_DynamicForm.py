@@ -20,8 +20,13 @@
     Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 '''
 
+import os
+import shutil
+import tempfile
+
 from DynamicForm.DynamicForm import DynamicForm
 from DynamicForm import HTTP
+from DynamicForm import PageControls
 
 
 blankRequest = HTTP.Request()
@@ -57,3 +62,81 @@ class TestDynamicForm(object):
 
     def test_renderResponse(self):
         assert "DOCTYPE" in self.testForm.renderResponse(blankRequest)
+
+    def test_streamResponse(self):
+        class StreamingDynamicForm(DynamicForm):
+            streaming = True
+        streamingForm = StreamingDynamicForm()
+
+        chunks = list(streamingForm.renderResponse(HTTP.Request(method="GET")))
+        assert len(chunks) == 4
+        assert "DOCTYPE" in chunks[0]
+        assert streamingForm.title(blankRequest) in chunks[0]
+        assert "".join(chunks).strip().endswith("</html>")
+
+        assert "DOCTYPE" in streamingForm.renderResponse(HTTP.Request(method="POST"))
+
+    def test_streamError(self):
+        class BrokenStreamingForm(DynamicForm):
+            streaming = True
+
+            class MainControl(PageControls.PageControl):
+                def renderResponse(self, request):
+                    raise ValueError("Broken")
+        brokenForm = BrokenStreamingForm()
+
+        request = HTTP.Request({'requestHandler':'brokenStreamingForm'}, method="GET")
+        response = brokenForm.handleRequest(request)
+        chunks = list(response.content)
+        assert len(chunks) == 4
+        assert "Internal Server Error: Broken" in chunks[1]
+        assert response.status == HTTP.Response.Status.INTERNAL_SERVER_ERROR
+        assert "".join(chunks).strip().endswith("</html>")
+
+    def test_handlerRegistry(self):
+        script, version = self.testForm.registryScript()
+        response = self.testForm.renderResponse(HTTP.Request())
+        assert self.testForm.handlerRegistryURL(version) in response
+        assert script not in response
+
+        registryResponse = self.testForm.handleRequest(HTTP.Request({'requestHandler':'dynamicForm-handlerRegistry',
+                                                                     'v':version + '.js'}))
+        assert registryResponse.content == script
+        assert registryResponse.contentType == HTTP.Response.ContentType.JAVASCRIPT
+        assert registryResponse['Cache-Control'].startswith('public')
+
+        class InlineDynamicForm(DynamicForm):
+            inlineHandlerRegistry = True
+        inlineForm = InlineDynamicForm()
+        assert inlineForm.registryScript()[0] in inlineForm.renderResponse(HTTP.Request())
+
+    def test_resourceBundles(self):
+        root = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(root, "js"))
+            with open(os.path.join(root, "js", "WebBot.js"), 'w') as script:
+                script.write("var webBot = true;")
+
+            class BundledDynamicForm(DynamicForm):
+                bundleResources = True
+                resourceRoot = root
+
+                def requestResourceFiles(self, request):
+                    return ('js/WebBot.js', 'stylesheets/Site.css', 'js/Extra.js', 'js/Extra.js')
+            bundledForm = BundledDynamicForm()
+
+            (bundle, ), resources = bundledForm.pageResources()
+            assert resources == (bundle, 'stylesheets/Site.css')
+            response = bundledForm.renderResponse(HTTP.Request())
+            assert bundledForm.resourceBundleURL(bundle) in response
+            assert 'js/WebBot.js' not in response
+            assert response.count('stylesheets/Site.css') == response.count('js/Extra.js') == 1
+            assert response.index(bundledForm.resourceBundleURL(bundle)) < response.index('stylesheets/Site.css')
+
+            bundleResponse = bundledForm.handleRequest(HTTP.Request({'requestHandler':
+                                                                     'bundledDynamicForm-resourceBundles',
+                                                                     'bundle':bundle.name}))
+            assert bundleResponse.content == "var webBot = true;"
+            assert bundleResponse['Cache-Control'].startswith('public')
+        finally:
+            shutil.rmtree(root)
@@ -20,7 +20,15 @@
     Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 '''
 
+import copy
+import hashlib
+import io
+import json
+import threading
+import zlib
+
 from DynamicForm import HTTP
+from DynamicForm.Cache import LRUCache
 
 
 class TestCookie(object):
@@ -82,6 +90,25 @@ class TestFieldDict(object):
         assert self.testDict.last('nonUniqueList') == "B"
         assert self.testDict.last('uniqueList') == "C"
 
+    def test_fromPairs(self):
+        fields = HTTP.FieldDict.fromPairs((('a', '1'), ('b', '2'), ('a', '3'), ('a', '1'), ('c', '')))
+        assert type(fields) == HTTP.FieldDict
+        assert fields == {'a':['1', '3', '1'], 'b':'2', 'c':''}
+        assert list(fields.keys()) == ['a', 'b', 'c']
+        assert fields.last('a') == '1'
+
+    def test_fromLists(self):
+        fields = HTTP.FieldDict.fromLists((('a', ['1']), ('b', ['1', '2']), ('c', [])))
+        assert fields == {'a':'1', 'b':['1', '2'], 'c':[]}
+
+    def test_add(self):
+        fieldDict = HTTP.FieldDict()
+        fieldDict.add('field', "A")
+        assert fieldDict['field'] == "A"
+        fieldDict.add('field', "B")
+        fieldDict.add('field', "C")
+        assert fieldDict['field'] == ["A", "B", "C"]
+
     def test_subset(self):
         subset = self.testDict.subset(['nonUniqueList', 'uniqueList'])
         assert list(subset.keys()) == ['nonUniqueList', 'uniqueList']
@@ -95,6 +122,76 @@ class TestFieldDict(object):
                                                "uniqueList=A&uniqueList=B&uniqueList=C")
 
 
+class TestSharedFieldDict(object):
+    """
+        Tests that the SharedFieldDict object is a complete copy that never changes the dictionary it was made from
+    """
+    def test_create(self):
+        shared = HTTP.FieldDict({'field':'value', 'list':["A", "B"]})
+        sharedDict = HTTP.SharedFieldDict(shared)
+        assert isinstance(sharedDict, HTTP.FieldDict)
+        assert sharedDict == shared
+        assert len(sharedDict) == 2
+        assert 'field' in sharedDict
+        assert sharedDict.get('notSet') == ""
+        assert sharedDict.first('list') == "A"
+        assert dict(sharedDict) == {'field':'value', 'list':["A", "B"]}
+        assert json.loads(json.dumps(sharedDict)) == shared
+        assert json.loads(json.dumps(HTTP.Request(shared).copy().fields)) == shared
+
+    def test_independent(self):
+        shared = HTTP.FieldDict({'field':'value'})
+        sharedDict = HTTP.SharedFieldDict(shared)
+        sharedDict['field'] = "newValue"
+        sharedDict['newField'] = "value"
+        assert shared == {'field':'value'}
+        assert sharedDict == {'field':'newValue', 'newField':'value'}
+
+        sharedDict = HTTP.SharedFieldDict(shared)
+        del sharedDict['field']
+        assert shared == {'field':'value'}
+        assert not sharedDict
+
+    def test_add(self):
+        shared = HTTP.FieldDict({'list':["A"]})
+        sharedDict = HTTP.SharedFieldDict(shared)
+        sharedDict.add('list', "B")
+        sharedDict.add('field', "value")
+        assert sharedDict == {'list':["A", "B"], 'field':"value"}
+        assert shared == {'list':["A"]}
+
+
+class TestFieldView(object):
+    """
+        Tests that the FieldView object never lets changes through to the fields it views
+    """
+    def test_copyOnAccess(self):
+        fields = HTTP.FieldDict({'field':'value', 'list':["A", "B"]})
+        view = HTTP.FieldView(fields)
+        assert view == fields
+        assert json.loads(json.dumps(view)) == fields
+        assert view['field'] == "value"
+
+        view['list'].pop(0)
+        view.get('list').append("C")
+        assert view['list'] == ["B", "C"]
+        assert fields['list'] == ["A", "B"]
+
+        assert view.pop('list') == ["B", "C"]
+        assert 'list' not in view
+        assert fields['list'] == ["A", "B"]
+
+    def test_pop(self):
+        fields = HTTP.FieldDict({'list':["A", "B"]})
+        view = HTTP.FieldView(fields)
+        popped = view.pop('list')
+        popped.append("C")
+        assert fields['list'] == ["A", "B"]
+        assert view.pop('notSet', None) is None
+        assert view.setdefault('list', []) == []
+        assert dict(view) == {'list':[]}
+
+
 class TestRequest(object):
     """
         Tests all public instance methods of the Request object
@@ -112,6 +209,38 @@ class TestRequest(object):
         assert HTTP.Request().isAjax() == False
         assert HTTP.Request(meta={'HTTP_X_REQUESTED_WITH':'XMLHttpRequest'}).isAjax() == True
 
+    def test_ifNoneMatch(self):
+        assert HTTP.Request().ifNoneMatch() == set()
+        assert HTTP.Request(meta={'HTTP_IF_NONE_MATCH':'"a", W/"b"'}).ifNoneMatch() == set(['"a"', '"b"'])
+
+    def test_acceptedEncodings(self):
+        assert HTTP.Request().acceptedEncodings() == {}
+        assert HTTP.Request(meta={'HTTP_ACCEPT_ENCODING':'gzip, br;q=0, deflate;q=0.5'}).acceptedEncodings() == \
+               {'gzip':1.0, 'br':0.0, 'deflate':0.5}
+
+    def test_fromWSGIEnviron(self):
+        body = (b'--boundary\r\nContent-Disposition: form-data; name="field"\r\n\r\nA\r\n'
+                b'--boundary\r\nContent-Disposition: form-data; name="field"\r\n\r\nB\r\n'
+                b'--boundary\r\nContent-Disposition: form-data; name="upload"; filename="file.txt"\r\n'
+                b'Content-Type: text/plain\r\n\r\nFile Content\r\n--boundary--\r\n')
+        request = HTTP.Request.fromWSGIEnviron({'REQUEST_METHOD':'POST', 'PATH_INFO':'/page',
+                                                'CONTENT_TYPE':'multipart/form-data; boundary=boundary',
+                                                'CONTENT_LENGTH':str(len(body)), 'wsgi.input':io.BytesIO(body),
+                                                'QUERY_STRING':'requestHandler=page&list=1&list=2',
+                                                'HTTP_COOKIE':'cookie=value; other=otherValue'})
+        assert request.method == "POST"
+        assert request.path == "/page"
+        assert request.fields == {'field':["A", "B"], 'requestHandler':"page", 'list':["1", "2"]}
+        assert request.files['upload'].fileName == "file.txt"
+        assert request.files['upload'].content == b"File Content"
+        assert request.cookies == {'cookie':'value', 'other':'otherValue'}
+
+        body = b'field=A&encoded=%C3%A9&blank='
+        request = HTTP.Request.fromWSGIEnviron({'REQUEST_METHOD':'POST', 'CONTENT_LENGTH':str(len(body)),
+                                                'CONTENT_TYPE':'application/x-www-form-urlencoded',
+                                                'wsgi.input':io.BytesIO(body)})
+        assert request.fields == {'field':"A", 'encoded':u"\xe9", 'blank':""}
+
     def test_copy(self):
         firstRequest = HTTP.Request(fields={'field':'data'}, method="POST")
         secondRequest = firstRequest.copy()
@@ -128,6 +257,126 @@ class TestRequest(object):
         assert firstRequest.method == "POST"
         assert firstRequest.fields['field'] == "data"
 
+        #assert the copy gets its own response
+        secondRequest.response['header'] = "value"
+        secondRequest.response.content = "content"
+        assert secondRequest.response is not firstRequest.response
+        assert firstRequest.response.get('header') == None
+        assert firstRequest.response.content == ""
+
+    def test_copyOnRead(self):
+        request = HTTP.Request(fields={'field':'data'}, meta={'HTTP_HOST':'localhost'})
+        copiedRequest = request.copy()
+        assert type(copiedRequest._fields) == type(copiedRequest._meta) == HTTP.Lazy
+
+        assert copiedRequest.fields == {'field':'data'}
+        assert type(copiedRequest._fields) == HTTP.SharedFieldDict
+        assert type(copiedRequest._meta) == HTTP.Lazy
+        assert copiedRequest.fields is not request.fields
+
+    def test_slots(self):
+        request = HTTP.Request()
+        assert not hasattr(request, '__dict__')
+        assert request._response is None and request._fields is None
+        assert request.fields == {}
+        assert request.fields is request.fields
+
+        copiedRequest = request.copy()
+        assert copiedRequest._response is None
+        assert copy.copy(request).response is request.response
+
+    def test_lazy(self):
+        loads = []
+        def loadFields():
+            loads.append('fields')
+            return HTTP.FieldDict({'field':'data'})
+
+        request = HTTP.Request(fields=HTTP.Lazy(loadFields), meta=HTTP.Lazy(HTTP.FieldDict, {'key':'value'}))
+        copiedRequest = request.copy()
+        assert not loads
+        assert copiedRequest.fields['field'] == "data"
+        assert request.fields['field'] == "data"
+        assert loads == ['fields']
+        assert request.meta == {'key':'value'}
+
+        copiedRequest.fields['field'] = "newData"
+        assert request.fields['field'] == "data"
+
+    def test_lazyThreads(self):
+        loads = []
+        loading = threading.Event()
+        release = threading.Event()
+        def loadFields():
+            loads.append('fields')
+            loading.set()
+            release.wait(5)
+            return HTTP.FieldDict({'field':'data'})
+
+        request = HTTP.Request(fields=HTTP.Lazy(loadFields))
+        copies = [request.copy() for thread in range(4)]
+        results = []
+        threads = [threading.Thread(target=lambda copiedRequest=copiedRequest:
+                                           results.append(copiedRequest.fields['field'])) for copiedRequest in copies]
+        for thread in threads:
+            thread.start()
+        loading.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert loads == ['fields']
+        assert results == ["data"] * 4
+
+    def test_lazyIndependent(self):
+        firstLoading = threading.Event()
+        def loadFirst():
+            firstLoading.set()
+            return HTTP.FieldDict({'field':'first'})
+
+        def loadSecond():
+            return HTTP.FieldDict({'field':firstLoading.wait(2) and 'second' or 'blocked'})
+
+        requests = (HTTP.Request(fields=HTTP.Lazy(loadSecond)), HTTP.Request(fields=HTTP.Lazy(loadFirst)))
+        results = []
+        threads = [threading.Thread(target=lambda request=request: results.append(request.fields['field']))
+                   for request in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert sorted(results) == ["first", "second"]
+
+    def test_fromDjangoRequest(self):
+        class FakeQueryDict(dict):
+            def lists(self):
+                return self.items()
+
+        class FakeDjangoRequest(object):
+            method = "GET"
+            path = "/page"
+            user = None
+            body = b""
+            COOKIES = {'cookie':'value'}
+            META = {'HTTP_X_REQUESTED_WITH':'XMLHttpRequest'}
+            GET = FakeQueryDict({'field':['data'], 'list':['A', 'B']})
+            FILES = {}
+
+            @property
+            def POST(self):
+                raise AssertionError("POST data should not be loaded unless fields are accessed")
+
+        request = HTTP.Request.fromDjangoRequest(FakeDjangoRequest())
+        assert request.isAjax()
+        assert request.cookies['cookie'] == "value"
+        assert request.path == "/page"
+
+        class FakeDjangoPost(FakeDjangoRequest):
+            POST = FakeQueryDict({'field':['posted'], 'other':['value']})
+
+        request = HTTP.Request.fromDjangoRequest(FakeDjangoPost())
+        assert request.fields == {'field':'data', 'list':['A', 'B'], 'other':'value'}
+
 
 class TestResponse(object):
     """
@@ -149,6 +398,30 @@ class TestResponse(object):
         assert testResponse.get('header') == None
         assert testResponse.get('header', '') == ""
 
+    def test_defaultHeaders(self):
+        testResponse = HTTP.Response("MyResponse")
+        assert testResponse._headers is None and testResponse._cookies is None
+        assert testResponse['Pragma'] == 'no-cache'
+        assert testResponse.headers() == HTTP.Response.NO_CACHE_HEADERS
+
+        del testResponse['Pragma']
+        testResponse['header'] = "value"
+        assert testResponse.get('Pragma') == None
+        assert 'Pragma' not in testResponse.headers()
+        assert testResponse.headers()['header'] == "value"
+        assert HTTP.Response()['Pragma'] == 'no-cache'
+        assert HTTP.Response.NO_CACHE_HEADERS['Pragma'] == 'no-cache'
+
+        assert HTTP.Response(isDynamic=False).headers() == {}
+
+    def test_setCacheable(self):
+        testResponse = HTTP.Response("MyResponse")
+        assert testResponse['Pragma'] == 'no-cache'
+        testResponse.setCacheable(60)
+        assert testResponse['Cache-Control'] == 'public, max-age=60'
+        assert testResponse.get('Pragma') == None
+        assert testResponse.get('Expires') == None
+
     def test_setCookie(self):
         testResponse = HTTP.Response("MyResponse")
         newCookie = testResponse.setCookie("myCookieName", "myCookieValue")
@@ -157,6 +430,49 @@ class TestResponse(object):
         assert newCookie.key == "myCookieName"
         assert newCookie.value == "myCookieValue"
 
+    def test_compress(self):
+        testResponse = HTTP.Response("A" * 2048)
+        assert testResponse.compress({'gzip':1.0}) == "gzip"
+        assert testResponse['Content-Encoding'] == "gzip"
+        assert testResponse['Vary'] == "Accept-Encoding"
+        assert zlib.decompress(testResponse.content, 31) == b"A" * 2048
+        assert testResponse.compress({'gzip':1.0}) == None # Already compressed
+
+        assert HTTP.Response("A" * 2048).compress({'identity':1.0}) == None
+        assert HTTP.Response("A" * 2048).compress({'gzip':0}) == None
+        assert HTTP.Response("Small").compress({'gzip':1.0}) == None
+
+    def test_compressCached(self):
+        cache = LRUCache()
+        firstResponse = HTTP.Response("A" * 2048)
+        firstResponse.encodingCache = cache
+        firstResponse.compress({'gzip':1.0})
+
+        secondResponse = HTTP.Response("A" * 2048)
+        secondResponse.encodingCache = cache
+        secondResponse.compress({'gzip':1.0})
+        assert secondResponse.content is firstResponse.content
+        assert list(cache._entries) == [('gzip', 6, hashlib.sha1(b"A" * 2048).digest())]
+
+    def test_compressETag(self):
+        testResponse = HTTP.Response("A" * 2048)
+        testResponse['ETag'] = '"tag"'
+        testResponse.compress({'gzip':1.0})
+        assert testResponse['ETag'] == 'W/"tag"'
+
+    def test_toWSGI(self):
+        started = []
+        testResponse = HTTP.Response("MyResponse", status=HTTP.Response.Status.NOT_FOUND)
+        testResponse.setCookie("myCookieName", "myCookieValue")
+        body = testResponse.toWSGI(lambda status, headers: started.append((status, headers)))
+        assert list(body) == [b"MyResponse"]
+
+        status, headers = started[0]
+        assert status == "404 Not Found"
+        assert ('Content-Type', 'text/html;charset=UTF-8') in headers
+        assert ('Content-Length', '10') in headers
+        assert ('Set-Cookie', 'myCookieName=myCookieValue;Path=/') in headers
+
     def test_serialize(self):
         testResponse = HTTP.Response(content="'hey'", contentType=HTTP.Response.ContentType.JSON,
                                      status=HTTP.Response.Status.NON_AUTHORITAVE)
@@ -0,0 +1,114 @@
+'''
+    test_Metrics.py
+
+    Tests that the metrics registry records handler responses and reports them as expected
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import json
+
+from DynamicForm import HTTP
+from DynamicForm import Metrics
+from DynamicForm.RequestHandler import RequestHandler
+
+
+class MeasuredFrame(RequestHandler):
+    metrics = Metrics.Registry()
+
+    def renderResponse(self, request):
+        return "frame"
+
+    class Broken(RequestHandler):
+
+        def renderResponse(self, request):
+            raise ValueError("Error")
+
+    class Streamed(RequestHandler):
+
+        def renderResponse(self, request):
+            return (chunk for chunk in ("first", "second"))
+
+    class Stats(Metrics.StatsHandler):
+        pass
+
+
+class TestRegistry(object):
+    """
+        Tests that the registry aggregates the responses recorded per handler
+    """
+    def test_record(self):
+        registry = Metrics.Registry(buckets=(0.1, 1))
+        registry.record("page", HTTP.Response.Status.OK, 0.05, 7)
+        registry.record("page", HTTP.Response.Status.OK, 0.5, 7)
+        registry.record("page", HTTP.Response.Status.INTERNAL_SERVER_ERROR, 2)
+        registry.record(None, HTTP.Response.Status.NOT_FOUND, 0.01, 7)
+
+        snapshot = registry.snapshot()
+        assert sorted(snapshot) == ["page", Metrics.UNKNOWN]
+        page = snapshot['page']
+        assert page['requests'] == {str(HTTP.Response.Status.OK):2, str(HTTP.Response.Status.INTERNAL_SERVER_ERROR):1}
+        assert page['errors'] == {'internalError':1}
+        assert page['latency']['buckets'] == [(0.1, 1), (1, 2), ("+Inf", 3)]
+        assert page['latency']['count'] == 3 and page['latency']['sum'] == 2.55
+        assert page['bytes'] == {'sum':14, 'count':2}
+        assert snapshot[Metrics.UNKNOWN]['errors'] == {'notFound':1}
+
+        registry.reset()
+        assert registry.snapshot() == {}
+
+    def test_toPrometheus(self):
+        registry = Metrics.Registry(buckets=(0.1, ))
+        registry.record("page", HTTP.Response.Status.UNAUTHORIZED, 0.05, 6)
+        lines = registry.toPrometheus().splitlines()
+        assert '# TYPE dynamicform_request_seconds histogram' in lines
+        assert 'dynamicform_requests_total{handler="page",status="%s"} 1' % HTTP.Response.Status.UNAUTHORIZED in lines
+        assert 'dynamicform_errors_total{handler="page",error="unauthorized"} 1' in lines
+        assert 'dynamicform_request_seconds_bucket{handler="page",le="0.1"} 1' in lines
+        assert 'dynamicform_request_seconds_bucket{handler="page",le="+Inf"} 1' in lines
+        assert 'dynamicform_response_bytes_sum{handler="page"} 6' in lines
+
+
+class TestStatsHandler(object):
+    """
+        Tests that handleRequest feeds the root's registry and the stats handler reports it
+    """
+    def test_stats(self):
+        measuredFrame = MeasuredFrame()
+        measuredFrame.handleRequest(HTTP.Request({'requestHandler':'measuredFrame'}))
+        measuredFrame.handleRequest(HTTP.Request({'requestHandler':['measuredFrame-broken', 'measuredFrame-missing']}))
+
+        response = measuredFrame.handleRequest(HTTP.Request({'requestHandler':'measuredFrame-stats', 'format':'json'}))
+        assert response.contentType == HTTP.Response.ContentType.JSON
+        stats = json.loads(response.content)
+        assert stats['measuredFrame']['requests'] == {str(HTTP.Response.Status.OK):1}
+        assert stats['measuredFrame']['bytes'] == {'sum':5, 'count':1}
+        assert stats['measuredFrame-broken']['errors'] == {'internalError':1}
+        assert stats[Metrics.UNKNOWN]['errors'] == {'notFound':1}
+
+        response = measuredFrame.handleRequest(HTTP.Request({'requestHandler':'measuredFrame-stats'}))
+        assert response.contentType == Metrics.StatsHandler.PROMETHEUS_CONTENT_TYPE
+        assert 'dynamicform_requests_total{handler="measuredFrame-stats",status="%s"} 1' % HTTP.Response.Status.OK \
+               in response.content.splitlines()
+
+    def test_streamed(self):
+        measuredFrame = MeasuredFrame()
+        response = measuredFrame.handleRequest(HTTP.Request({'requestHandler':'measuredFrame-streamed'}))
+        assert 'measuredFrame-streamed' not in MeasuredFrame.metrics.snapshot()
+
+        assert "".join(response.content) == "firstsecond"
+        assert MeasuredFrame.metrics.snapshot()['measuredFrame-streamed']['bytes'] == {'sum':11, 'count':1}
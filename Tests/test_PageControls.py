@@ -69,6 +69,43 @@ class TestPageControl(object):
 
         assert not "Heyyyy!" in testNoAutoLoad.content()
 
+    def test_call(self):
+        instance = self.testControl(1, HTTP.Request(), autoLoad=False)
+        assert instance is not self.testControl
+        assert instance.id == "testControl1"
+        assert instance.request.fields['requestID'] == "testControl1"
+        assert instance.autoLoad is False
+        assert "testControl1:Loading" in instance._loading
+        assert instance.childHandlers is self.testControl.childHandlers
+        assert instance.accessor == self.testControl.accessor
+        assert self.testControl.id == "testControl"
+
+    def test_instanceState(self):
+        class StatefulControl(TestControl):
+            def __init__(self, *args, **kwargs):
+                TestControl.__init__(self, *args, **kwargs)
+                self.history = ["created"]
+                self.options = {'size':1}
+
+        statefulControl = StatefulControl()
+        instance = statefulControl(1, HTTP.Request())
+        instance.history.append("rendered")
+        instance.options['size'] = 2
+        assert statefulControl.history == ["created"]
+        assert statefulControl.options == {'size':1}
+        assert instance.history == ["created", "rendered"]
+        assert instance.childHandlers is statefulControl.childHandlers
+
+    def test_loading(self):
+        instance = self.testControl(2, HTTP.Request())
+        assert "testControl2:Loading" in instance._loading
+        assert "testControl:Loading" not in instance._loading
+        assert TestControl.loadingTemplate(instance) is TestControl.loadingTemplate(self.testControl)
+
+        class TestControlNoLoading(TestControl):
+            showLoading = False
+        assert not TestControlNoLoading()._loading
+
     def test_buildElement(self):
         testElement = self.testControl.buildElement("label", "myLabel", properties={'text':'labelText'})
         assert type(testElement) == Label
@@ -113,6 +150,33 @@ class TestElementControl(object):
         assert not "This is a label" in response
 
 
+class TestPageControlCache(object):
+    """
+        Tests that page controls with a cacheTimeout reuse their rendered responses for matching GET requests
+    """
+    def test_cache(self):
+        class CachedControl(PageControls.ElementControl):
+            cacheTimeout = 60
+            cacheVaryBy = ('page', )
+            renders = 0
+
+            def buildUI(self, request):
+                CachedControl.renders += 1
+                return self.buildElement("label", properties={'text':'Page %s' % request.fields.get('page')})
+
+        cachedControl = CachedControl()
+        firstResponse = cachedControl.renderResponse(HTTP.Request({'page':'1'}, method="GET"))
+        assert "Page 1" in firstResponse
+        assert cachedControl.renderResponse(HTTP.Request({'page':'1'}, method="GET")) == firstResponse
+        assert CachedControl.renders == 1
+
+        assert "Page 2" in cachedControl.renderResponse(HTTP.Request({'page':'2'}, method="GET"))
+        assert CachedControl.renders == 2
+
+        cachedControl.renderResponse(HTTP.Request({'page':'1'}, method="POST"))
+        assert CachedControl.renders == 3
+
+
 class TestTemplateControl(object):
     """
         Tests all publicly accessible functions of the base template control object
@@ -130,4 +194,63 @@ class TestTemplateControl(object):
         assert ui.label.text() == "TemplateLabel"
         assert ui.toHTML() in self.testControl.renderResponse(HTTP.Request())
 
+    def test_prototype(self):
+        assert self.testControl.prototype() is self.testControl.prototype()
+        first = self.testControl.buildUI(HTTP.Request())
+        second = self.testControl.buildUI(HTTP.Request())
+        assert first is not second and first is not self.testControl.prototype()
+        assert first.label is not second.label
+
+        first.label.setText("Changed")
+        assert second.label.text() == "TemplateLabel"
+        assert self.testControl.prototype().label.text() == "TemplateLabel"
+
+    def test_segments(self):
+        class SegmentedControl(PageControls.TemplateControl):
+            template = UITemplate.fromSHPAML("> flow\n"
+                                             "    > label@title text=Title\n"
+                                             "    > label@name text=Name")
+            dynamicElements = ('name', )
+            verifySegments = True
 
+            def setUIData(self, ui, request):
+                ui.name.setText(request.fields.get('name', 'Nobody'))
+
+        segmentedControl = SegmentedControl()
+        staticHTML, slots = segmentedControl.segments()
+        assert len(staticHTML) == 2 and "Title" in staticHTML[0]
+        assert slots == (('name', None), )
+
+        response = segmentedControl.renderResponse(HTTP.Request({'name':'Timothy'}, method="GET"))
+        assert "Title" in response
+        assert "Timothy" in response
+        assert "Name" not in response
+
+        class UnsegmentedControl(SegmentedControl):
+            dynamicElements = None
+        assert UnsegmentedControl().segments() is None
+
+    def test_segmentedPlacements(self):
+        class PlacedControl(PageControls.TemplateControl):
+            template = UITemplate.fromSHPAML("> flow\n"
+                                             "    > label@title text=Title\n"
+                                             "    > pageControlPlacement@placement control=content")
+            dynamicElements = ()
+            verifySegments = True
+
+            class Content(PageControls.PageControl):
+                def renderResponse(self, request):
+                    return "Rendered by %s" % self.accessor
+
+        class FirstPage(RequestHandler):
+            PlacedControl = PlacedControl
+
+        class SecondPage(RequestHandler):
+            PlacedControl = PlacedControl
+
+        first = FirstPage().placedControl.renderResponse(HTTP.Request(method="GET"))
+        second = SecondPage().placedControl.renderResponse(HTTP.Request(method="GET"))
+        assert "Rendered by firstPage-placedControl-content" in first
+        assert "Rendered by secondPage-placedControl-content" in second
+        assert "firstPage" not in second
+        assert PlacedControl().segments()[1] == (('placement', 0), )
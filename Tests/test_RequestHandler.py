@@ -20,7 +20,11 @@
     Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 '''
 
+import json
+import threading
+
 from DynamicForm import HTTP
+from DynamicForm import Tracing
 from DynamicForm.RequestHandler import RequestHandler
 
 class Frame(RequestHandler):
@@ -47,6 +51,80 @@ class Frame(RequestHandler):
         def makeConnections(self):
             self.makeConnectionsWasCalled = True
 
+class ConcurrentFrame(RequestHandler):
+    concurrentHandlers = 4
+    concurrentTimeout = 0.2
+
+    class Fast(RequestHandler):
+
+        def renderResponse(self, request):
+            return "fast"
+
+    class Stuck(RequestHandler):
+        release = threading.Event()
+
+        def renderResponse(self, request):
+            self.release.wait(5)
+            return "stuck"
+
+
+class TaggedFrame(RequestHandler):
+    useETags = True
+
+    def renderResponse(self, request):
+        return "frame"
+
+    class Versioned(RequestHandler):
+        renders = 0
+
+        def contentVersion(self, request):
+            return 1
+
+        def renderResponse(self, request):
+            self.renders += 1
+            return "versioned"
+
+
+class GuardedFrame(RequestHandler):
+    viewChecks = 0
+    resolved = ()
+
+    def _canView(self, request):
+        GuardedFrame.viewChecks += 1
+        return request.user != "anonymous"
+
+    def resolvePermissions(self, request, handlers):
+        GuardedFrame.resolved = tuple(handler.accessor for handler in handlers)
+        request.permissions[('canEdit', self.locked.accessor)] = False
+
+    def renderResponse(self, request):
+        return "frame"
+
+    class Content(RequestHandler):
+
+        def renderResponse(self, request):
+            return "content"
+
+    class Locked(RequestHandler):
+
+        def renderResponse(self, request):
+            return "locked"
+
+
+class TracedFrame(RequestHandler):
+    serverTiming = True
+    spans = []
+    tracer = Tracing.Tracer(spans.append)
+
+    def renderResponse(self, request):
+        return "frame"
+
+    class Content(RequestHandler):
+
+        def renderResponse(self, request):
+            return "content"
+
+
 class TestRequestHandler(object):
     """
         Tests all public methods on the RequestHandler class
@@ -114,3 +192,123 @@ class TestRequestHandler(object):
         assert str(self.testFrame) == "Frame"
         assert str(self.testFrame.content) == "Frame Content"
         assert str(self.testFrame.exceptionThrower) == "Frame ExceptionThrower"
+
+    def test_compiledSpec(self):
+        assert Frame.compiledSpec() is Frame.compiledSpec()
+        assert Frame.compiledSpec() is self.testFrame._spec
+        assert Frame.childClasses() == (Frame.Content, Frame.ExceptionThrower)
+
+        secondFrame = Frame()
+        assert secondFrame.content._spec is self.testFrame.content._spec
+        assert secondFrame.content.grabFields is self.testFrame.content.grabFields
+        assert secondFrame.content is not self.testFrame.content
+
+    def test_resolveHandler(self):
+        assert self.testFrame.resolveHandler('') == self.testFrame
+        assert self.testFrame.resolveHandler('frame') == self.testFrame
+        assert self.testFrame.resolveHandler('frame-content') == self.testFrame.content
+        assert self.testFrame.resolveHandler('-content') == self.testFrame.content
+        assert self.testFrame.content.resolveHandler('content') == self.testFrame.content
+        assert self.testFrame.resolveHandler('frame-nonExistent') is None
+        assert self.testFrame.resolveHandler('nonExistent') is None
+
+        class Registered(RequestHandler):
+            pass
+        registered = self.testFrame.content.registerControl(Registered)
+        assert self.testFrame.resolveHandler('frame-content-registered') == registered
+
+    def test_handleRequestConcurrently(self):
+        concurrentFrame = ConcurrentFrame()
+        try:
+            response = concurrentFrame.handleRequest(HTTP.Request({'requestHandler':['concurrentFrame-fast',
+                                                                                     'concurrentFrame-fast',
+                                                                                     'concurrentFrame-stuck']}))
+        finally:
+            ConcurrentFrame.Stuck.release.set()
+        assert response.status == HTTP.Response.Status.MULTI_STATUS
+        result = json.loads(response.content)
+        assert [handlerResponse['status'] for handlerResponse in result] == [HTTP.Response.Status.OK,
+                                                                             HTTP.Response.Status.OK,
+                                                                             HTTP.Response.Status.GATEWAY_TIMEOUT]
+        assert result[0]['responseText'] == result[1]['responseText'] == "fast"
+        assert result[2]['responseText'] == "Timeout: concurrentFrame-stuck did not respond in time."
+
+    def test_etags(self):
+        taggedFrame = TaggedFrame()
+        response = taggedFrame.handleRequest(HTTP.Request({'requestHandler':'taggedFrame'}, method="GET"))
+        etag = response['ETag']
+        assert response.status == HTTP.Response.Status.OK
+        assert response.content == "frame"
+        assert response.serialize()['etag'] == etag
+
+        response = taggedFrame.handleRequest(HTTP.Request({'requestHandler':'taggedFrame'}, method="GET",
+                                                          meta={'HTTP_IF_NONE_MATCH':'"other", ' + etag}))
+        assert response.status == HTTP.Response.Status.NOT_MODIFIED
+        assert response.content == ""
+
+        response = taggedFrame.handleRequest(HTTP.Request({'requestHandler':'taggedFrame'}, method="POST",
+                                                          meta={'HTTP_IF_NONE_MATCH':etag}))
+        assert response.status == HTTP.Response.Status.OK
+        assert response.get('ETag') == None
+
+        response = taggedFrame.handleRequest(HTTP.Request({'requestHandler':'taggedFrame-versioned'}, method="GET"))
+        assert taggedFrame.versioned.renders == 1
+        response = taggedFrame.handleRequest(HTTP.Request({'requestHandler':'taggedFrame-versioned'}, method="GET",
+                                                          meta={'HTTP_IF_NONE_MATCH':response['ETag']}))
+        assert response.status == HTTP.Response.Status.NOT_MODIFIED
+        assert taggedFrame.versioned.renders == 1
+
+    def test_registryScript(self):
+        script, version = self.testFrame.registryScript()
+        assert self.testFrame.registryScript() == (script, version)
+        assert script.startswith("DynamicForm.registerHandlers(") and script.endswith(");")
+
+        registry = json.loads(script[len("DynamicForm.registerHandlers("):-2])
+        assert registry['frame'] == {'grabFields':['field1'], 'grabForms':['form1']}
+        assert registry['frame-content'] == {'grabFields':['field2', 'field3'], 'grabForms':['form2', 'form3']}
+
+        nestedScript = self.testFrame.content.registryScript()[0]
+        assert '"frame-content"' in nestedScript
+        standaloneScript = Frame.Content().registryScript()[0]
+        assert '"content"' in standaloneScript and '"frame-content"' not in standaloneScript
+
+    def test_permissions(self):
+        guardedFrame = GuardedFrame()
+        request = HTTP.Request(user="user")
+        assert guardedFrame.content.canView(request)
+        assert guardedFrame.content.canEdit(request)
+        assert guardedFrame.canView(request.copy())
+        assert GuardedFrame.viewChecks == 1
+
+        response = guardedFrame.handleRequest(HTTP.Request({'requestHandler':'guardedFrame-content'},
+                                                           user="anonymous"))
+        assert response.status == HTTP.Response.Status.UNAUTHORIZED
+        assert response.content == guardedFrame.content.renderUnauthorized(request)
+
+        response = guardedFrame.handleRequest(HTTP.Request({'requestHandler':['guardedFrame-content',
+                                                                              'guardedFrame-locked',
+                                                                              'guardedFrame-missing']},
+                                                           method="POST", user="user"))
+        assert GuardedFrame.resolved == ('guardedFrame-content', 'guardedFrame-locked')
+        assert [result['status'] for result in json.loads(response.content)] == [HTTP.Response.Status.OK,
+                                                                                 HTTP.Response.Status.UNAUTHORIZED,
+                                                                                 HTTP.Response.Status.NOT_FOUND]
+
+    def test_tracing(self):
+        tracedFrame = TracedFrame()
+        response = tracedFrame.handleRequest(HTTP.Request({'requestHandler':['tracedFrame', 'tracedFrame-content']}))
+        spans = [(span.accessor, span.phase) for span in TracedFrame.spans]
+        assert spans == [('tracedFrame', 'renderResponse'), ('tracedFrame-content', 'renderResponse'),
+                         ('tracedFrame', 'request')]
+        trace = TracedFrame.spans[-1]
+        assert trace.parent is None and trace.children == TracedFrame.spans[:2]
+        assert all(span.duration >= 0 for span in TracedFrame.spans)
+
+        serverTiming = response['Server-Timing'].split(", ")
+        assert [timing.split(";")[0] for timing in serverTiming] == ['tracedFrame.request',
+                                                                     'tracedFrame.renderResponse',
+                                                                     'tracedFrame-content.renderResponse']
+        assert all(timing.split(";")[1].startswith("dur=") for timing in serverTiming)
+
+        response = self.testFrame.handleRequest(HTTP.Request({'requestHandler':'frame'}))
+        assert response.get('Server-Timing') is None
@@ -0,0 +1,79 @@
+'''
+    test_Resources.py
+
+    Tests that resource files are deduplicated and bundled as expected
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+import os
+import shutil
+import tempfile
+
+from DynamicForm import Resources
+
+
+class TestResources(object):
+    """
+        Tests all public functions of the Resources module
+    """
+    def test_unique(self):
+        assert Resources.unique(('b.js', 'a.css', 'b.js', 'c.js', 'a.css')) == ('b.js', 'a.css', 'c.js')
+        assert Resources.unique(()) == ()
+
+    def test_minify(self):
+        script = "var a = `first\n\n    second`;\nvar b = 'one \\\n  two';\n"
+        assert Resources.minify(script, "js") == script
+        assert Resources.minify("/* header */\n.a {\n    color: red;\n}\n", "css") == ".a {\ncolor: red;\n}"
+
+    def test_bundle(self):
+        root = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(root, "js"))
+            for name, content in (("js/first.js", "var first = 1;\n"), ("js/second.js", "  var second = 2;"),
+                                  ("site.css", "body {\n    margin: 0;\n}")):
+                with open(os.path.join(root, name), 'w') as resource:
+                    resource.write(content)
+
+            bundles, resources = Resources.bundle(('js/first.js', 'site.css', 'http://cdn/lib.js', 'js/second.js',
+                                                   'missing.js', 'js/first.js', 'images/logo.png'), root)
+            assert [bundle.fileType for bundle in bundles] == ['js', 'css', 'js']
+            first, styles, second = bundles
+            assert resources == (first, styles, 'http://cdn/lib.js', second, 'missing.js', 'images/logo.png')
+            assert first.files == ('js/first.js', ) and second.files == ('js/second.js', )
+            assert first.name.startswith("bundle.") and first.name.endswith(".js")
+            assert styles.content == "body {\nmargin: 0;\n}"
+
+            (scripts, styles), resources = Resources.bundle(('js/first.js', 'site.css', 'js/second.js'), root)
+            assert resources == (scripts, styles)
+            assert scripts.files == ('js/first.js', 'js/second.js')
+            assert scripts.content == "var first = 1;\n;\n  var second = 2;"
+            assert Resources.bundle(('js/first.js', 'js/second.js'), root)[0][0].name == scripts.name
+        finally:
+            shutil.rmtree(root)
+
+    def test_rebaseURLs(self):
+        stylesheet = ('@import "print.css";\n'
+                      '.a { background: url(../images/a.png); }\n'
+                      '.b { background: url("fonts/b.woff") url("/c.png") url(data:image/png;base64,AAAA); }\n'
+                      '.c { background: url(http://cdn/d.png) url(#e); }')
+        assert Resources.rebaseURLs(stylesheet, "static/css/site.css") == \
+               ('@import "static/css/print.css";\n'
+                '.a { background: url(static/images/a.png); }\n'
+                '.b { background: url("static/css/fonts/b.woff") url("/c.png") url(data:image/png;base64,AAAA); }\n'
+                '.c { background: url(http://cdn/d.png) url(#e); }')
+        assert Resources.rebaseURLs(stylesheet, "site.css") == stylesheet
@@ -0,0 +1,86 @@
+'''
+    test_Tracing.py
+
+    Tests that request tracing spans nest and report their timings as expected
+
+    Copyright (C) 2013  Timothy Edmund Crosley
+
+    This program is free software; you can redistribute it and/or
+    modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation; either version 2
+    of the License, or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+'''
+
+from DynamicForm import HTTP
+from DynamicForm import Tracing
+from DynamicForm.RequestHandler import RequestHandler
+
+
+class Traced(RequestHandler):
+
+    class Child(RequestHandler):
+        pass
+
+    class Streamed(RequestHandler):
+
+        def renderResponse(self, request):
+            with Tracing.span(request, self, "chunk"):
+                yield "chunk"
+
+
+class TestTracing(object):
+    """
+        Tests that spans nest within the request they trace and are passed to the tracer's sink
+    """
+    traced = Traced()
+
+    def test_untraced(self):
+        request = HTTP.Request()
+        assert Tracing.span(request, self.traced, "buildUI") is Tracing.NULL_SPAN
+        with Tracing.span(request, self.traced, "buildUI"):
+            assert request.span is None
+
+    def test_span(self):
+        spans = []
+        request = HTTP.Request()
+        with Tracing.Tracer(spans.append).trace(request, self.traced) as trace:
+            assert request.span is trace
+            with Tracing.span(request, self.traced.child, "buildUI") as buildUI:
+                assert request.span is buildUI
+                subRequest = request.copy()
+                with Tracing.span(subRequest, self.traced.child, "toHTML"):
+                    assert request.span is buildUI
+            assert request.span is trace
+        assert request.span is None
+
+        assert [(span.accessor, span.phase) for span in spans] == [('traced-child', 'toHTML'),
+                                                                    ('traced-child', 'buildUI'),
+                                                                    ('traced', 'request')]
+        assert list(trace.walk()) == spans[::-1]
+        assert trace.serverTiming().startswith("traced.request;dur=")
+        assert trace.serverTiming().count(", ") == 2
+
+    def test_trace(self):
+        assert Tracing.trace(HTTP.Request(), self.traced).tracer is Tracing.DEFAULT_TRACER
+
+    def test_streamed(self):
+        spans = []
+        traced = Traced()
+        traced.tracer = Tracing.Tracer(spans.append)
+        response = traced.handleRequest(HTTP.Request({'requestHandler':'traced-streamed'}))
+        assert [(span.accessor, span.phase) for span in spans] == [('traced-streamed', 'renderResponse'),
+                                                                    ('traced', 'request')]
+
+        assert list(response.content) == ["chunk"]
+        assert [(span.accessor, span.phase) for span in spans[2:]] == [('traced-streamed', 'chunk'),
+                                                                        ('traced-streamed', 'stream')]
+        assert spans[-1].parent is None and spans[-1].children == [spans[2]]